@@ -0,0 +1,17 @@
+from .models import GuessRequest
+
+
+async def record(tv_show_name: str, guess: str, response: dict):
+    """Store a new guess and its response before the view answers, so no row is lost."""
+    await GuessRequest.objects.acreate(tv_show_name=tv_show_name, guess=guess, response=response)
+
+
+async def lookup(tv_show_name: str, guess: str):
+    """Most recent stored response for the same (show, guess) pair, or None."""
+    row = await (
+        GuessRequest.objects.filter(lookup_key=GuessRequest.make_lookup_key(tv_show_name, guess), response__isnull=False)
+        .order_by("-created_at")
+        .only("response")
+        .afirst()
+    )
+    return row.response if row else None
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:00
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_lookup_keys(apps, schema_editor):
+    GuessRequest = apps.get_model("api", "GuessRequest")
+    requests = list(GuessRequest.objects.filter(lookup_key=""))
+    for request in requests:
+        normalized = "\n".join(" ".join(text.lower().split()) for text in (request.tv_show_name, request.guess))
+        request.lookup_key = hashlib.sha256(normalized.encode()).hexdigest()
+    GuessRequest.objects.bulk_update(requests, ["lookup_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guessrequest',
+            name='lookup_key',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Hash of the normalized show and guess, for answering repeats', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='guessrequest',
+            index=models.Index(fields=['tv_show_name', 'created_at'], name='api_guess_show_created_idx'),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+import hashlib
 from django.db import models
 
 # Create your models here.
@@ -6,6 +7,23 @@ class GuessRequest(models.Model):
     guess = models.CharField(max_length=300, help_text="Your guess of the plot")
     created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the guess was made")
     response = models.JSONField(null=True, blank=True, help_text="Response from the AI model")
+    lookup_key = models.CharField(max_length=64, db_index=True, blank=True, default="", help_text="Hash of the normalized show and guess, for answering repeats")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tv_show_name", "created_at"], name="api_guess_show_created_idx"),
+        ]
+
+    @staticmethod
+    def make_lookup_key(tv_show_name: str, guess: str) -> str:
+        """Same key for guesses that differ only in case or spacing."""
+        normalized = "\n".join(" ".join(text.lower().split()) for text in (tv_show_name, guess))
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        if not self.lookup_key:
+            self.lookup_key = self.make_lookup_key(self.tv_show_name, self.guess)
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.tv_show_name} - {self.guess[:50]}..."  # Display first 50 characters of the guess
\ No newline at end of file
+        return f"{self.tv_show_name} - {self.guess[:50]}..."  # Display first 50 characters of the guess
@@ -1,3 +1,33 @@
+from types import SimpleNamespace
+from unittest import mock
 from django.test import TestCase
 
-# Create your tests here.
+from . import history, views
+from .models import GuessRequest
+
+
+class HistoryTests(TestCase):
+    async def test_record_is_written_before_returning(self):
+        await history.record("Breaking Bad", "Walt poisons Brock", {"is_correct": True})
+        self.assertEqual(await GuessRequest.objects.acount(), 1)
+        self.assertEqual(await history.lookup("breaking  bad", "Walt Poisons Brock"), {"is_correct": True})
+
+    async def test_lookup_misses_other_guesses(self):
+        await history.record("Breaking Bad", "Walt poisons Brock", {"is_correct": True})
+        self.assertIsNone(await history.lookup("Breaking Bad", "Jesse poisons Brock"))
+
+
+class GuessThePlotViewTests(TestCase):
+    def parsed_response(self):
+        evaluation = views.PlotGuessEvaluation(is_correct=True, accuracy=0.9, time="Season 4", explanation="It happens.", confidence=0.8)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=evaluation))])
+
+    def test_each_answer_is_stored_and_repeats_skip_the_model(self):
+        parse = mock.AsyncMock(return_value=self.parsed_response())
+        with mock.patch.object(views.client.chat.completions, "parse", parse):
+            for _ in range(2):
+                response = self.client.post("/api/guess-ai/", {"tv_show_name": "Breaking Bad", "guess": "Walt poisons Brock"}, content_type="application/json")
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()["response"]["is_correct"])
+        self.assertEqual(parse.await_count, 1)
+        self.assertEqual(GuessRequest.objects.count(), 1)
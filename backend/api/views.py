@@ -1,16 +1,17 @@
 from typing import Optional
-from rest_framework.views import APIView, Response
+from adrf.views import APIView
+from rest_framework.response import Response
 
-from .models import GuessRequest
+from . import history
 from .serializers import GuessThePlotSerializer
-from openai import OpenAI
+from openai import AsyncOpenAI
 import openai
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = OpenAI(timeout=30)
+client = AsyncOpenAI(timeout=30)
 
 SYSTEM_MESSAGE="You are an expert in TV shows and their plots. Your task is to evaluate a guess about a TV show plot and provide feedback on its accuracy, events' time in the show, your confidence level, and an explanation of your evaluation. A guess is correct even if it is not 100% accurate, as long as it captures the main events and themes of the plot. If the event in the guess occurs even once in the show, it is considered correct, even if it is not the final resolution of the plot."
 USER_MESSAGE="""
@@ -28,15 +29,20 @@ class PlotGuessEvaluation(BaseModel):
     confidence: float = Field(..., description="Confidence level of your response. 0-1 scale")
 
 # Create your views here.
-class GuessThePlotView(APIView):    
-    def post(self, request):
+class GuessThePlotView(APIView):
+    # Async under ASGI, so a slow OpenAI call does not hold a worker thread
+    async def post(self, request):
         serializer = GuessThePlotSerializer(data=request.data)
         if serializer.is_valid():
             data = serializer.validated_data
             tv_show_name = data['tv_show_name']
             guess = data['guess']
+            # Repeat guesses are answered from the stored history without calling the model
+            previous = await history.lookup(tv_show_name, guess)
+            if previous is not None:
+                return Response({"response": previous}, status=200)
             try:
-                response = client.chat.completions.parse(
+                response = await client.chat.completions.parse(
                     model="gpt-4.1-mini",
                     messages=[
                         {"role": "system", "content": SYSTEM_MESSAGE},
@@ -46,11 +52,7 @@ class GuessThePlotView(APIView):
                     response_format=PlotGuessEvaluation,
                     max_tokens=200
                 )
-                GuessRequest.objects.create(
-                    tv_show_name=tv_show_name,
-                    guess=guess,
-                    response=response.choices[0].message.parsed.dict()
-                )
+                await history.record(tv_show_name, guess, response.choices[0].message.parsed.dict())
                 print(response)
                 return Response({"response":response.choices[0].message.parsed.dict()}, status=200)
                 
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     "api",
     "rest_framework",
+    "adrf",
     "corsheaders",
 ]
 
@@ -77,6 +78,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# Serve with an ASGI server (e.g. `uvicorn backend.asgi:application`) so the async view
+# runs on the event loop
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -86,6 +90,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL lets reads continue during writes; writers wait instead of failing with "database is locked"
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000;',
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -0,0 +1,63 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Collects concurrent `ainvoke` calls on a LangChain runnable for up to `window_ms`
+    (or until `max_batch_size` inputs are waiting) and dispatches them together with
+    `abatch`. Each caller still gets its own result or exception back.
+
+    A window of 0 disables batching and calls the runnable directly. That is the right
+    setting unless the runnable's abatch sends one request for the whole batch.
+    """
+
+    def __init__(self, runnable, window_ms: float = 20, max_batch_size: int = 8):
+        self.runnable = runnable
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def ainvoke(self, input):
+        if self.window <= 0:
+            return await self.runnable.ainvoke(input)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((input, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            outputs = await self.runnable.abatch([input for input, _ in batch], return_exceptions=True)
+        except Exception as e:
+            outputs = [e] * len(batch)
+        for (_, future), output in zip(batch, outputs):
+            if future.done():
+                continue
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
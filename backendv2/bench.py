@@ -0,0 +1,276 @@
+"""
+Offline benchmark and load test for backendv2 with stubbed LLM and search backends.
+
+Swaps the chat model and ddgs.DDGS for local fakes with configurable latency and failure
+rates, then drives /evaluate-guess and /feedback in-process at a given concurrency and
+reports p50/p95/p99 latency, requests per second and event-loop blocking time.
+
+Usage:
+    python bench.py --requests 500 --concurrency 50 --output results.json
+    python bench.py --llm-latency 0.8 --search-latency 0.4 --failure-rate 0.02
+
+Runs are seeded, so results from different commits are comparable.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeRunnable:
+    """Stands in for a LangChain runnable: sleeps for a log-normal latency, sometimes fails."""
+
+    def __init__(self, respond, latency: float, failure_rate: float, rng: random.Random):
+        self.respond = respond
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = rng
+        self.calls = 0
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.rng.lognormvariate(0, 0.4) * self.latency)
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError("Injected fake LLM failure")
+        return self.respond(input)
+
+    async def abatch(self, inputs, config=None, return_exceptions=False, **kwargs):
+        return await asyncio.gather(*(self.ainvoke(input) for input in inputs), return_exceptions=return_exceptions)
+
+
+class FakeChatModel(FakeRunnable):
+    """Fake chat model: plain calls return five search queries, structured calls a random evaluation."""
+
+    def __init__(self, latency: float, failure_rate: float, rng: random.Random, direct_confidence: float,
+                 invalid_rate: float = 0.0):
+        # Queries depend on the prompt so distinct guesses do not share search cache entries
+        super().__init__(
+            lambda messages: FakeMessage("\n".join(f"fake query {i} {abs(hash(str(messages))) % 10 ** 8}" for i in range(5))),
+            latency, failure_rate, rng,
+        )
+        self.direct_confidence = direct_confidence
+        self.invalid_rate = invalid_rate
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        def respond(_):
+            correct = self.rng.random() < 0.5
+            parsed = schema(
+                is_correct=correct,
+                accuracy=self.rng.random() if correct else 0.0,
+                time="Season 2" if correct else None,
+                explanation="Fake evaluation.",
+                confidence=self.direct_confidence if self.rng.random() < 0.5 else 0.99,
+            )
+            if not include_raw:
+                return parsed
+            text = parsed.model_dump_json()
+            if self.rng.random() < self.invalid_rate:
+                # Half of the invalid replies can be repaired locally, the rest are cut off
+                text = f"```json\n{text}\n```" if self.rng.random() < 0.5 else text[:len(text) // 2]
+                return {"raw": FakeMessage(text), "parsed": None, "parsing_error": ValueError("Invalid JSON")}
+            return {"raw": FakeMessage(text), "parsed": parsed, "parsing_error": None}
+        return FakeRunnable(respond, self.latency, self.failure_rate, self.rng)
+
+
+class FakeDDGS:
+    """Blocking stand-in for ddgs.DDGS, like the real client it runs on the search thread pool."""
+
+    latency = 0.3
+    failure_rate = 0.0
+    rng = random.Random(0)
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def text(self, query, max_results=3, **kwargs):
+        time.sleep(self.rng.lognormvariate(0, 0.4) * self.latency)
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError("Injected fake search failure")
+        return [
+            {"title": f"Result {i} for {query}", "body": f"Snippet {i} about {query} from a fake search engine."}
+            for i in range(max_results)
+        ]
+
+
+async def monitor_event_loop(samples: list, interval: float = 0.01):
+    """Record how late each wake-up is; lateness means something blocked the loop."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "count": len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def setup_environment(args, workdir: str):
+    """Point every on-disk store at a scratch directory and lift limits that would skew the run."""
+    os.environ.update({
+        "USE_OPENAI": "true",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench-fake-key"),
+        "RESULT_CACHE_PATH": os.path.join(workdir, "result_cache.db"),
+        "SEMANTIC_CACHE_PATH": os.path.join(workdir, "semantic_cache.db"),
+        "SEARCH_CACHE_PATH": os.path.join(workdir, "search_cache.db"),
+        "STORE_PATH": os.path.join(workdir, "store.db"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.db"),
+        "PLOT_INDEX_DIR": os.path.join(workdir, "plot_index"),
+        "SERIES_INDEX_PATH": os.path.join(workdir, "series_titles.txt"),
+        "GLOBAL_RATE_PER_SEC": "100000",
+        "GLOBAL_BURST": "100000",
+        "CLIENT_RATE_PER_MIN": "1000000",
+        "CLIENT_BURST": "100000",
+        "OPENAI_RPM": "100000000",
+        "OPENAI_TPM": "100000000000",
+    })
+
+
+def install_fakes(main, args, rng: random.Random):
+    main.configure_models({
+        "openai": FakeChatModel(args.llm_latency, args.failure_rate, rng, args.direct_confidence, args.invalid_output_rate)
+    })
+    FakeDDGS.latency = args.search_latency
+    FakeDDGS.failure_rate = args.search_failure_rate
+    FakeDDGS.rng = random.Random(args.seed + 1)
+    import ddgs
+    ddgs.DDGS = FakeDDGS
+
+
+GUESS_WORDS = (
+    "alice bob carol dave erin frank grace heidi ivan judy mallory oscar peggy trent victor walter "
+    "marries betrays kills rescues leaves joins discovers hides becomes loses wins fakes returns steals "
+    "brother sister father mother captain doctor king queen spy detective ghost robot wizard pilot "
+    "island prison castle hospital spaceship school desert city forest ocean"
+).split()
+
+
+async def drive(main, args, rng: random.Random) -> dict:
+    import httpx
+
+    shows = [f"Show {i}" for i in range(args.shows)]
+    jobs = []
+    for i in range(args.requests):
+        if rng.random() < args.feedback_ratio:
+            jobs.append(("/feedback", {"feedback": f"Benchmark feedback {i}"}))
+        elif i and rng.random() < args.repeat_ratio:
+            jobs.append(("/evaluate-guess", {"tv_show_name": rng.choice(shows), "guess": "the main character dies"}))
+        else:
+            # Random word salad, so fresh guesses do not look like paraphrases to the semantic cache
+            guess = " ".join(rng.choice(GUESS_WORDS) for _ in range(6))
+            jobs.append(("/evaluate-guess", {"tv_show_name": rng.choice(shows), "guess": guess}))
+
+    latencies = {"/evaluate-guess": [], "/feedback": []}
+    errors = {"/evaluate-guess": 0, "/feedback": 0}
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def worker():
+            while not queue.empty():
+                path, body = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                latencies[path].append(time.perf_counter() - started)
+                errors[path] += 0 if ok else 1
+
+        lag_samples = []
+        monitor = asyncio.ensure_future(monitor_event_loop(lag_samples))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+
+    return {
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(jobs) / elapsed,
+        "endpoints": {path: {**summarize(values), "errors": errors[path]} for path, values in latencies.items()},
+        "event_loop": {
+            "max_lag": max(lag_samples, default=0.0),
+            "p99_lag": percentile(lag_samples, 0.99),
+            "blocked_seconds": sum(lag for lag in lag_samples if lag > 0.005),
+        },
+        "structured_outputs": {
+            ",".join(f"{name}={value}" for name, value in labels): count
+            for labels, count in main.metrics.STRUCTURED_OUTPUTS.values.items()
+        },
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--shows", type=int, default=10, help="Number of distinct shows to spread guesses over")
+    parser.add_argument("--feedback-ratio", type=float, default=0.1)
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="Share of guesses repeated, to exercise caches")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Median fake LLM latency in seconds")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Median fake search latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake LLM failure probability")
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-output-rate", type=float, default=0.0,
+                        help="Share of fake structured replies that fail validation and need repair")
+    parser.add_argument("--direct-confidence", type=float, default=0.5,
+                        help="Confidence of half of the fake direct answers; below the threshold they take the search path")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_environment(args, workdir)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import main as app_main
+        install_fakes(app_main, args, rng)
+        results = asyncio.run(drive(app_main, args, rng))
+    report = {"commit": git_commit(), "config": vars(args), "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
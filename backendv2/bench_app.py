@@ -0,0 +1,15 @@
+"""
+ASGI app for multi-worker benchmarks: main.app with the bench.py fakes installed.
+
+Every uvicorn worker imports this module on its own; the fakes are configured from
+BENCH_ARGS (bench.py flags), which scale_bench.py sets.
+"""
+import os
+import shlex
+import random
+import bench
+import main
+
+args = bench.parse_args(shlex.split(os.getenv("BENCH_ARGS", "")))
+bench.install_fakes(main, args, random.Random(args.seed + os.getpid()))
+app = main.app
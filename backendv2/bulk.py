@@ -0,0 +1,56 @@
+"""
+Score many (show, guess) pairs from a JSONL file.
+
+Each input line is {"tv_show_name": ..., "guess": ..., "id": optional}. Results are
+appended to the output file as they finish, and a rerun with the same output file
+skips ids that are already there, so an interrupted run resumes where it stopped.
+
+Usage:
+    python bulk.py guesses.jsonl results.jsonl --concurrency 8
+"""
+import os
+import json
+import asyncio
+import argparse
+from main import bulk_evaluate, parse_bulk_items
+
+
+def completed_ids(path: str) -> set:
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interruption, it will be redone
+                    continue
+                if "result" in record:
+                    done.add(record["id"])
+    return done
+
+
+async def run(input_path: str, output_path: str, concurrency: int):
+    with open(input_path, "r", encoding="utf-8") as f:
+        items = parse_bulk_items(f)
+    done = completed_ids(output_path)
+    remaining = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} guesses, {len(done)} already done, {len(remaining)} to evaluate")
+    with open(output_path, "a+", encoding="utf-8") as f:
+        # Start on a fresh line if the previous run was cut off mid-write
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")
+        async for output in bulk_evaluate(remaining, concurrency):
+            f.write(json.dumps(output, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.input, args.output, args.concurrency))
@@ -0,0 +1,181 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different inputs share a key."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "with", "by",
+    "is", "are", "was", "were", "be", "been", "will", "would", "get", "gets", "got",
+    "do", "does", "did", "that", "this", "it", "its", "they", "he", "she", "his", "her",
+    "end", "eventually", "finally", "show", "series",
+}
+
+
+def stem(word: str) -> str:
+    for suffix, replacement in (("ies", "y"), ("ied", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Normalized, stemmed content words of a text."""
+    return [stem(word) for word in normalize_text(text).split() if word not in STOPWORDS]
+
+
+class ResultCache:
+    """
+    Disk-backed cache of evaluation results keyed on the normalized (tv_show_name, guess) pair.
+
+    Entries expire after `ttl` seconds and the least recently used ones are evicted once
+    the cache holds more than `max_entries` rows.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "show_key TEXT NOT NULL, guess_key TEXT NOT NULL, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (show_key, guess_key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(tv_show_name: str, guess: str) -> tuple[str, str]:
+        return normalize_text(tv_show_name), normalize_text(guess)
+
+    def get(self, tv_show_name: str, guess: str):
+        """Return the cached value as a dict, or None on a miss or expired entry."""
+        show_key, guess_key = self.key(tv_show_name, guess)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE show_key = ? AND guess_key = ?",
+                (show_key, guess_key),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM results WHERE show_key = ? AND guess_key = ?", (show_key, guess_key)
+                    )
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE show_key = ? AND guess_key = ?",
+                (now, show_key, guess_key),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, tv_show_name: str, guess: str, value: dict):
+        show_key, guess_key = self.key(tv_show_name, guess)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (show_key, guess_key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (show_key, guess_key, json.dumps(value), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size, "max_entries": self.max_entries}
+
+    def close(self):
+        self._conn.close()
+
+
+class SearchCache:
+    """
+    Disk-backed cache of raw web search results, keyed by show and normalized query.
+
+    Results fetched for one guess are reused by later guesses about the same show
+    until they are older than `ttl` seconds.
+    """
+
+    def __init__(self, path: str, ttl: float = 3 * 24 * 3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "show_key TEXT NOT NULL, query_key TEXT NOT NULL, results TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (show_key, query_key))"
+        )
+        self._conn.commit()
+
+    def get(self, tv_show_name: str, query: str):
+        """Return the cached list of {"title", "body"} results, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM searches WHERE show_key = ? AND query_key = ? AND created_at >= ?",
+                (normalize_text(tv_show_name), normalize_text(query), time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, tv_show_name: str, query: str, results: list[dict]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (show_key, query_key, results, created_at) VALUES (?, ?, ?, ?)",
+                (normalize_text(tv_show_name), normalize_text(query), json.dumps(results), time.time()),
+            )
+            self._conn.execute("DELETE FROM searches WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()
+            (shows,) = self._conn.execute("SELECT COUNT(DISTINCT show_key) FROM searches").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size, "shows": shows}
+
+    def close(self):
+        self._conn.close()
+
+
+def dedupe_snippets(snippets: list[dict], seen: set) -> list[dict]:
+    """Drop snippets whose normalized body was already seen, recording new ones in `seen`."""
+    unique = []
+    for snippet in snippets:
+        key = normalize_text(snippet["body"])
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(snippet)
+    return unique
@@ -0,0 +1,54 @@
+import os
+import asyncio
+import threading
+import httpx
+
+
+class Clients:
+    """
+    Long-lived network clients shared by the whole app, so no request pays for a new
+    connection pool or TLS handshake.
+
+    Created at import time (the models are built with them), warmed up and closed by the
+    FastAPI lifespan.
+    """
+
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60")),
+        )
+        timeout = httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", "60")), connect=10)
+        # LLM provider traffic (OpenAI SDK accepts both a sync and an async client)
+        self.llm_http = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.llm_http_sync = httpx.Client(limits=limits, timeout=timeout)
+        self.omdb = httpx.AsyncClient(base_url="https://www.omdbapi.com", limits=limits, timeout=5)
+        self.webhooks = httpx.AsyncClient(limits=limits, timeout=10)
+        self.search_timeout = float(os.getenv("SEARCH_TIMEOUT", "8"))
+        self._local = threading.local()
+
+    def search(self):
+        """DuckDuckGo client for the calling search thread; each pool thread keeps its own session."""
+        client = getattr(self._local, "ddgs", None)
+        if client is None:
+            import ddgs
+            client = ddgs.DDGS(timeout=int(self.search_timeout))
+            self._local.ddgs = client
+        return client
+
+    async def warm_up(self, urls: list[str]):
+        """Open connections to the providers ahead of the first request."""
+        async def touch(client, url):
+            try:
+                await client.head(url)
+            except Exception as e:
+                print(f"Warm-up request to {url} failed: {e}")
+
+        await asyncio.gather(*(touch(self.omdb if "omdbapi" in url else self.llm_http, url) for url in urls))
+
+    async def aclose(self):
+        await self.llm_http.aclose()
+        await self.omdb.aclose()
+        await self.webhooks.aclose()
+        self.llm_http_sync.close()
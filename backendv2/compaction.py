@@ -0,0 +1,80 @@
+"""
+Search-context compaction: drop near-duplicate snippets, rank the rest by BM25 relevance
+to the guess and keep the best ones that fit a token budget.
+"""
+import math
+from collections import Counter
+from cache import tokenize
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def _shingles(tokens: list[str], size: int = 3) -> set:
+    if len(tokens) < size:
+        return {tuple(tokens)}
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def dedupe_near_duplicates(snippets: list[dict], threshold: float = 0.5) -> list[dict]:
+    """Keep the first of any group of snippets whose word 3-gram Jaccard similarity is above `threshold`."""
+    kept, kept_shingles = [], []
+    for snippet in snippets:
+        shingles = _shingles(tokenize(snippet["title"] + " " + snippet["body"]))
+        if any(len(shingles & other) / len(shingles | other) > threshold for other in kept_shingles):
+            continue
+        kept.append(snippet)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def bm25_scores(query: str, documents: list[str], k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """Okapi BM25 score of each document against the query, with the documents as the corpus."""
+    docs = [tokenize(document) for document in documents]
+    if not docs:
+        return []
+    avg_length = sum(len(doc) for doc in docs) / len(docs) or 1
+    document_frequency = Counter(term for doc in docs for term in set(doc))
+    query_terms = set(tokenize(query))
+    scores = []
+    for doc in docs:
+        frequencies = Counter(doc)
+        score = 0.0
+        for term in query_terms:
+            if term not in frequencies:
+                continue
+            idf = math.log(1 + (len(docs) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            tf = frequencies[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+        scores.append(score)
+    return scores
+
+
+def compact_snippets(snippets: list[dict], query: str, top_k: int = 8, token_budget: int = 1200):
+    """
+    Return the snippets worth sending to the model, in relevance order, and a stats dict
+    with the estimated prompt tokens before and after compaction.
+    """
+    def snippet_tokens(snippet):
+        return estimate_tokens(f"- {snippet['title']}: {snippet['body']}\n")
+
+    tokens_before = sum(snippet_tokens(snippet) for snippet in snippets)
+    unique = dedupe_near_duplicates(snippets)
+    scores = bm25_scores(query, [snippet["title"] + " " + snippet["body"] for snippet in unique])
+    ranked = [snippet for _, snippet in sorted(zip(scores, unique), key=lambda pair: -pair[0])]
+
+    kept, tokens_after = [], 0
+    for snippet in ranked[:top_k]:
+        tokens = snippet_tokens(snippet)
+        if kept and tokens_after + tokens > token_budget:
+            continue
+        kept.append(snippet)
+        tokens_after += tokens
+    return kept, {
+        "snippets_before": len(snippets),
+        "snippets_after": len(kept),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+    }
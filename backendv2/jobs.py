@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import ipaddress
+import threading
+from urllib.parse import urlsplit
+
+# Hosts webhooks may be sent to, e.g. "hooks.example.com,ci.example.org"; any public host if empty
+WEBHOOK_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()}
+
+
+class UnsafeWebhook(ValueError):
+    """A webhook URL that could reach the service's own network."""
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global excludes private, loopback, link-local, shared (100.64/10) and reserved ranges
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url: str) -> str:
+    """Reject webhook URLs that are not https, carry credentials, or name a non-public host or IP."""
+    parts = urlsplit(url)
+    if parts.scheme != "https" or not parts.hostname:
+        raise UnsafeWebhook("webhook_url must be an https URL")
+    if parts.username or parts.password:
+        raise UnsafeWebhook("webhook_url must not contain credentials")
+    host = parts.hostname.lower().rstrip(".")
+    if WEBHOOK_ALLOWED_HOSTS and host not in WEBHOOK_ALLOWED_HOSTS:
+        raise UnsafeWebhook(f"webhook host {host} is not allowed")
+    try:
+        public = is_public_address(host)
+    except ValueError:
+        if host == "localhost" or host.endswith((".localhost", ".local", ".internal")):
+            raise UnsafeWebhook(f"webhook host {host} is not public")
+        return url
+    if not public:
+        raise UnsafeWebhook(f"webhook host {host} is not public")
+    return url
+
+
+async def lookup_addresses(host: str, port: int) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def resolve_webhook(url: str) -> str:
+    """
+    Resolve the webhook host and return an address to connect to, raising UnsafeWebhook if
+    any address it resolves to is not public (a DNS name pointing into the private network).
+    """
+    parts = urlsplit(check_webhook_url(url))
+    addresses = await lookup_addresses(parts.hostname, parts.port or 443)
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise UnsafeWebhook(f"webhook host {parts.hostname} does not resolve to a public address")
+    return addresses[0]
+
+
+async def post_webhook(http, url: str, payload: dict):
+    """
+    POST to a webhook on the address that was just checked, so a DNS answer that changes
+    between the check and the connection cannot redirect it. TLS still verifies the name.
+    """
+    address = await resolve_webhook(url)
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    pinned = parts._replace(netloc=f"{host}:{parts.port}" if parts.port else host).geturl()
+    response = await http.post(
+        pinned,
+        json=payload,
+        headers={"Host": parts.netloc},
+        extensions={"sni_hostname": parts.hostname},
+        follow_redirects=False,
+    )
+    response.raise_for_status()
+
+
+class JobStore:
+    """
+    SQLite table of evaluation jobs so queued and finished jobs survive a restart.
+
+    Every worker process shares the table. A worker runs a job only after `claim`
+    atomically marks it as running under its name with a lease; a job whose lease ran out
+    (its worker died) can be claimed again.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, tv_show_name TEXT NOT NULL, guess TEXT NOT NULL, "
+            "webhook_url TEXT, result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        self._conn.commit()
+
+    def create(self, tv_show_name: str, guess: str, webhook_url: str = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, tv_show_name, guess, webhook_url, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, tv_show_name, guess, webhook_url, now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, job_id: str, owner: str, lease: float) -> bool:
+        """Mark a queued job, or one whose lease expired, as running for `owner`. False if taken."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND lease_until < ?))",
+                (owner, now + lease, now, job_id, now),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease: float) -> bool:
+        """Extend the lease of a running job; False if `owner` no longer holds it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                (now + lease, job_id, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, owner: str, status: str, result: dict = None, error: str = None) -> bool:
+        """Record the outcome of a job, only if `owner` still holds it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, tv_show_name, guess, webhook_url, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "tv_show_name", "guess", "webhook_url", "result", "error", "created_at", "updated_at")
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claimable(self, limit: int) -> list[str]:
+        """Queued jobs and running jobs whose worker stopped renewing the lease, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()
+        return count
+
+
+class JobRunner:
+    """
+    Bounded pool of asyncio workers that run queued jobs through `evaluate(tv_show_name, guess)`
+    and, when a job has a webhook, POST the finished job to it with `http`.
+
+    Each process polls the shared store every `poll_interval` seconds for jobs nobody has
+    claimed, including those submitted to other processes and those left behind by a dead
+    worker once their `lease` runs out. A running job's lease is renewed until it
+    finishes, so each job and its webhook run once.
+    """
+
+    def __init__(self, store: JobStore, evaluate, http, concurrency: int = 4, max_queued: int = 1000,
+                 lease: float = 120, poll_interval: float = 5):
+        self.store = store
+        self.evaluate = evaluate
+        self.http = http
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lost_leases = 0
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._workers = []
+
+    async def start(self):
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+        self._workers.append(asyncio.ensure_future(self._poll()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def full(self) -> bool:
+        return await asyncio.to_thread(self.store.count, "queued") >= self.max_queued
+
+    async def submit(self, tv_show_name: str, guess: str, webhook_url: str = None) -> str:
+        job_id = await asyncio.to_thread(self.store.create, tv_show_name, guess, webhook_url)
+        self._enqueue(job_id)
+        return job_id
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _poll(self):
+        while True:
+            try:
+                # Only top up to a few jobs per worker; the rest stay claimable by other processes
+                room = self.concurrency * 2 - self._queue.qsize()
+                if room > 0:
+                    for job_id in await asyncio.to_thread(self.store.claimable, room):
+                        self._enqueue(job_id)
+            except Exception as e:
+                print(f"Polling for jobs failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Job {job_id} crashed: {e}")
+            finally:
+                self._queued.discard(job_id)
+                self._queue.task_done()
+
+    async def _renew(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if not await asyncio.to_thread(self.store.renew, job_id, self.owner, self.lease):
+                return
+
+    async def _run(self, job_id: str):
+        if not await asyncio.to_thread(self.store.claim, job_id, self.owner, self.lease):
+            return
+        job = await asyncio.to_thread(self.store.get, job_id)
+        renewing = asyncio.ensure_future(self._renew(job_id))
+        try:
+            try:
+                result = await self.evaluate(job["tv_show_name"], job["guess"])
+                finished = await asyncio.to_thread(self.store.finish, job_id, self.owner, "done", result)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                finished = await asyncio.to_thread(self.store.finish, job_id, self.owner, "failed", None, str(e))
+        finally:
+            renewing.cancel()
+        if not finished:
+            # The lease ran out and another worker took the job over; it sends the webhook
+            self.lost_leases += 1
+            return
+        if job["webhook_url"]:
+            try:
+                await post_webhook(self.http, job["webhook_url"], await asyncio.to_thread(self.store.get, job_id))
+            except Exception as e:
+                print(f"Webhook for job {job_id} failed: {e}")
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "workers": self.concurrency, "lost_leases": self.lost_leases}
@@ -1,21 +1,66 @@
 import os
+import hmac
 import json
+import time
+import asyncio
 import datetime
-from langchain_openai import ChatOpenAI
-from langchain_core.tools import tool
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 from typing import Optional
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import MessagesState
 from langgraph.errors import GraphRecursionError 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-import ddgs
-from langchain.chat_models import init_chat_model
+from cache import ResultCache, SearchCache, dedupe_snippets, normalize_text
+from semantic_cache import SemanticCache
+from singleflight import SingleFlight
+from store import Store
+from batching import MicroBatcher
+from ratelimit import AdmissionController, ProviderLimiter, RateLimited, with_backoff
+from router import ModelRouter, ProviderHealth
+import metrics
+import recording
+from compaction import compact_snippets
+from series_index import SeriesIndex
+from plot_index import PlotIndex, as_snippet
+from clients import Clients
+from shared_state import from_url as shared_state_from_url
+from jobs import JobStore, JobRunner, UnsafeWebhook, check_webhook_url, resolve_webhook
 
-app = FastAPI()
+
+async def warm_up(max_delay: float = 60.0):
+    # A failed build (e.g. a missing provider key) is logged and retried with backoff,
+    # so /ready stays 503 with a visible reason instead of silently forever
+    delay = 1.0
+    while True:
+        try:
+            await ensure_graph()
+            break
+        except Exception as e:
+            print(f"Warm-up failed, retrying in {delay:.0f}s: {e!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+    await clients.warm_up(warm_up_urls())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models and graph are built in the background so the server binds right away;
+    # /ready reports when they are done. Provider connections are closed on shutdown
+    warming = asyncio.ensure_future(warm_up())
+    await job_runner.start()
+    yield
+    warming.cancel()
+    await job_runner.stop()
+    await clients.aclose()
+    search_executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -29,18 +74,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend reads it to tell users when to retry after a 429
+    expose_headers=["Retry-After"],
 )
 
 load_dotenv()
 
+# Shared HTTP sessions for the model provider, OMDB and DuckDuckGo
+clients = Clients()
+
+# Counters, rate limit buckets, single-flight locks and (optionally) results shared by
+# every worker process: SQLite in the store file on one host, Redis across hosts
+STORE_PATH = os.getenv("STORE_PATH", "store.db")
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", f"sqlite:///{STORE_PATH}")
+shared_state = shared_state_from_url(SHARED_STATE_URL)
+SHARED_RATE_LIMITS = os.getenv("SHARED_RATE_LIMITS", "true").lower() == "true"
+SHARED_SINGLE_FLIGHT = os.getenv("SHARED_SINGLE_FLIGHT", "true").lower() == "true"
+# On one host the SQLite result cache is already shared by all workers
+SHARED_RESULT_CACHE = os.getenv(
+    "SHARED_RESULT_CACHE", "true" if SHARED_STATE_URL.startswith(("redis", "unix")) else "false"
+).lower() == "true"
+
 SYSTEM_MESSAGE = (
     "You are an expert in TV shows and their plots. Your task is to evaluate a guess "
     "about a TV show plot and provide feedback on its accuracy, events' time in the show, "
     "your confidence level, and an explanation. Leave the time empty if the guess is incorrect A guess is correct even if it is not 100% accurate, "
     "as long as it captures the main events and themes of the plot. If the event in the guess occurs even "
     "once in the show, it is considered correct, even if it is not the final resolution of the plot.\n"
-    "You are given access to a web search tool to look up information about the TV show and its plot. Use this tool if you NEED more information to evaluate the guess. "
-
+    "Episode summaries and web search results about the show may be included with the guess. Base your "
+    "evaluation on them when they are relevant, and on your own knowledge of the show otherwise."
 )
 
 USER_MESSAGE = """
@@ -81,46 +143,347 @@ class AgentState(MessagesState):
     # Final structured response from the agent
     final_response: PlotGuessEvaluation
     search_results: str
+    # Summaries from the local plot index, shaped like search results
+    plot_snippets: list
     tv_show_name: str
     guess: str
+    # Which path produced final_response: "direct", "plot_index" or "search"
+    route: str
 
 
-def web_search(query: str) -> str:
-    """Perform a web search using DuckDuckGo."""
+def search_snippets(query: str) -> list[dict]:
+    """Perform a web search using DuckDuckGo and return the raw title/body snippets."""
     print(f"Performing web search for: {query}")
-    results = ddgs.DDGS().text(query, max_results=3, safesearch='off')
-    result_string = "\n".join([f"- {result['title']}: {result['body']}\n" for result in results])
+    results = clients.search().text(query, max_results=3, safesearch='off')
+    return [{"title": result["title"], "body": result["body"]} for result in results]
+
+def format_snippets(snippets: list[dict]) -> str:
+    result_string = "\n".join([f"- {snippet['title']}: {snippet['body']}\n" for snippet in snippets])
     return result_string if result_string else "No results found."
 
-tools = [tool(web_search, description="Useful for when you need to look up information about a TV show or its plot.")]
+def web_search(query: str) -> str:
+    """Perform a web search using DuckDuckGo."""
+    return format_snippets(search_snippets(query))
+
+# Raw search results are shared across guesses about the same show
+search_cache = SearchCache(
+    os.getenv("SEARCH_CACHE_PATH", "search_cache.db"),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", str(3 * 24 * 3600))),
+)
+
+# General queries fetched when warming a show; their cached results are added as
+# background to every evaluation of that show
+KNOWLEDGE_QUERIES = [
+    "{tv_show_name} plot summary",
+    "{tv_show_name} season by season summary",
+    "{tv_show_name} ending explained",
+    "{tv_show_name} main characters",
+]
+
+def cached_search(tv_show_name: str, query: str) -> list[dict]:
+    snippets = search_cache.get(tv_show_name, query)
+    if snippets is None:
+        snippets = search_snippets(query)
+        search_cache.set(tv_show_name, query, snippets)
+    return snippets
+
+# Searches for one guess run side by side on a bounded pool; a query that
+# errors or misses the deadline is skipped instead of failing the evaluation
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "10"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "8"))
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="web-search")
+
+async def search_with_timeout(tv_show_name: str, query: str, on_done=None) -> list[dict]:
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def search():
+        loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+        return cached_search(tv_show_name, query)
+
+    timer = metrics.SEARCH_SECONDS.time()
+    try:
+        with timer:
+            running = loop.run_in_executor(search_executor, search)
+            # The deadline covers the search itself, not its wait for a free pool thread
+            await started
+            snippets = await asyncio.wait_for(running, SEARCH_TIMEOUT)
+    except Exception as e:
+        metrics.SEARCH_ERRORS.inc(reason="timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+        recording.record("searches", {"query": query, "seconds": round(timer.seconds, 4), "results": None})
+        if on_done:
+            await on_done(query, None)
+        raise
+    recording.record("searches", {"query": query, "seconds": round(timer.seconds, 4), "results": snippets})
+    if on_done:
+        await on_done(query, snippets)
+    return snippets
+
+async def run_searches(tv_show_name: str, queries: list[str], on_done=None) -> list[tuple[str, list[dict]]]:
+    """
+    Run web searches concurrently and return (query, snippets) pairs in query order.
+    `on_done(query, snippets)` is awaited as each search finishes, with None for failures.
+    """
+    outcomes = await asyncio.gather(*(search_with_timeout(tv_show_name, query, on_done) for query in queries), return_exceptions=True)
+    results = []
+    for query, outcome in zip(queries, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            print(f"Web search timed out for: {query}")
+        elif isinstance(outcome, Exception):
+            print(f"Web search failed for {query}: {outcome}")
+        else:
+            results.append((query, outcome))
+    return results
+
+def show_knowledge(tv_show_name: str) -> list[dict]:
+    """Return cached background snippets for a show, if it has been warmed."""
+    snippets = []
+    for template in KNOWLEDGE_QUERIES:
+        snippets += search_cache.get(tv_show_name, template.format(tv_show_name=tv_show_name)) or []
+    return snippets
 
-# LLM that directly returns structured output
-if os.getenv("USE_OPENAI", "false").lower() == "true":
-    model = ChatOpenAI(model="gpt-4.1-mini")
-else:
-    model = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
+async def warm_show(tv_show_name: str):
+    """Fetch the knowledge queries for a show so later evaluations start from a warm cache."""
+    queries = [template.format(tv_show_name=tv_show_name) for template in KNOWLEDGE_QUERIES]
+    await run_searches(tv_show_name, queries)
 
-model_with_response_tool = model.bind_tools(tools, tool_choice="auto")
-model_with_structured_output = model_with_response_tool.with_structured_output(PlotGuessEvaluation)
+# Chat models per provider. Every provider with an API key is available to the router;
+# USE_OPENAI only decides which one is preferred while both are healthy
+def build_chat_models() -> dict:
+    # Provider SDKs are imported here rather than at module level, they dominate import time
+    def openai():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model="gpt-4.1-mini",
+            callbacks=[metrics.UsageCallback("gpt-4.1-mini")],
+            http_client=clients.llm_http_sync,
+            http_async_client=clients.llm_http,
+        )
+
+    def gemini():
+        from langchain.chat_models import init_chat_model
+        return init_chat_model("gemini-2.5-flash", model_provider="google_genai", callbacks=[metrics.UsageCallback("gemini-2.5-flash")])
+
+    preferred = ["openai", "gemini"] if os.getenv("USE_OPENAI", "false").lower() == "true" else ["gemini", "openai"]
+    builders = {"openai": openai, "gemini": gemini}
+    keys = {"openai": "OPENAI_API_KEY", "gemini": "GOOGLE_API_KEY"}
+    available = [name for name in preferred if os.getenv(keys[name])] or preferred[:1]
+    return {name: builders[name]() for name in available}
+
+# Off by default: abatch on the chat models is a gather of ainvoke calls and neither
+# provider has a synchronous batch endpoint, so a window only adds latency. A window
+# above 0 groups prompts arriving within it into one abatch dispatch.
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+
+# Client-side view of the provider quotas, so we queue briefly instead of hitting 429s
+limiter_state = shared_state if SHARED_RATE_LIMITS else None
+provider_limiters = {
+    "openai": ProviderLimiter(float(os.getenv("OPENAI_RPM", "500")), float(os.getenv("OPENAI_TPM", "200000")),
+                              shared=limiter_state, name="openai"),
+    "gemini": ProviderLimiter(float(os.getenv("GEMINI_RPM", "1000")), float(os.getenv("GEMINI_TPM", "1000000")),
+                              shared=limiter_state, name="gemini"),
+}
+
+# Hedging sends a slow call to the runner-up provider after the leader's p95 latency
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+# Seconds a provider error counts against it when ranking providers
+LLM_ERROR_WINDOW = float(os.getenv("LLM_ERROR_WINDOW", "60"))
+
+def structured(chat_model):
+    return chat_model.with_structured_output(PlotGuessEvaluation, method="json_schema", include_raw=True)
+
+# Filled in by configure_models; the batchers are created up front so their stats survive a rebind
+chat_models = {}
+routers = {}
+query_batcher = MicroBatcher(None, LLM_BATCH_WINDOW_MS, LLM_BATCH_MAX_SIZE)
+evaluation_batcher = MicroBatcher(None, LLM_BATCH_WINDOW_MS, LLM_BATCH_MAX_SIZE)
+direct_batcher = MicroBatcher(None, LLM_BATCH_WINDOW_MS, LLM_BATCH_MAX_SIZE)
+
+def configure_models(models: dict):
+    """(Re)bind the chat models used by every graph node, e.g. to swap in a fake for benchmarks."""
+    global chat_models, routers
+    chat_models = models
+
+    def router(runnables):
+        health = {name: ProviderHealth(error_window=LLM_ERROR_WINDOW) for name in runnables}
+        return ModelRouter(runnables, health, provider_limiters, LLM_HEDGE, LLM_HEDGE_MIN_DELAY)
+
+    routers = {
+        "query": router(chat_models),
+        # Native JSON-schema output without tool binding; the raw reply is kept for local repair
+        "evaluation": router({name: structured(chat_model) for name, chat_model in chat_models.items()}),
+        "direct": router({name: structured(chat_model) for name, chat_model in chat_models.items()}),
+    }
+    query_batcher.runnable = routers["query"]
+    evaluation_batcher.runnable = routers["evaluation"]
+    direct_batcher.runnable = routers["direct"]
+
+async def call_llm(batcher: MicroBatcher, messages, step: str):
+    """Invoke the routed models through a batcher, backing off when every provider is throttling."""
+    started = time.perf_counter()
+    output = await with_backoff(
+        lambda: batcher.ainvoke(messages),
+        on_retry=lambda: metrics.RETRIES.inc(kind="provider_rate_limit"),
+    )
+    if CAPTURE_PATH:
+        recording.record("llm_calls", {
+            "step": step,
+            "seconds": round(time.perf_counter() - started, 4),
+            "input": [{"role": message.type, "content": message_text(message)} for message in messages],
+            "output": llm_output_payload(output),
+        })
+    return output
+
+def llm_output_payload(output) -> dict:
+    if isinstance(output, dict):
+        # Structured output with include_raw: keep the raw text so repairs replay too
+        parsed = output["parsed"]
+        return {"raw": message_text(output["raw"]), "parsed": parsed.model_dump() if parsed is not None else None}
+    return {"content": message_text(output)}
 
-def web_searcher(state: AgentState):
-    response = model.invoke(
+class StructuredOutputError(Exception):
+    """The model did not produce a valid PlotGuessEvaluation, even after repair attempts."""
+
+# Invalid structured replies are repaired locally when possible, otherwise only the
+# failing LLM call is retried with the validation error; earlier graph steps are kept
+EVALUATION_REPAIR_ATTEMPTS = int(os.getenv("EVALUATION_REPAIR_ATTEMPTS", "2"))
+REPAIR_MESSAGE = (
+    "Your previous answer could not be used: {error}\n"
+    "Reply again with only a JSON object matching the requested schema."
+)
+
+def message_text(message) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in message.content)
+
+def repair_evaluation(text: str) -> PlotGuessEvaluation:
+    """Validate the JSON object inside a reply, e.g. one wrapped in a code fence or prose."""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("the reply contains no JSON object")
+    return PlotGuessEvaluation.model_validate_json(text[start:end + 1])
+
+async def call_structured(batcher: MicroBatcher, messages, step: str) -> PlotGuessEvaluation:
+    """Call a structured-output step and return a validated evaluation, repairing or retrying bad replies."""
+    for attempt in range(EVALUATION_REPAIR_ATTEMPTS + 1):
+        output = await call_llm(batcher, messages, step)
+        if output["parsed"] is not None:
+            metrics.STRUCTURED_OUTPUTS.inc(step=step, outcome="valid" if attempt == 0 else "retried")
+            return output["parsed"]
+        text = message_text(output["raw"])
+        try:
+            evaluation = repair_evaluation(text)
+        except ValueError as e:
+            error = e
+        else:
+            metrics.STRUCTURED_OUTPUTS.inc(step=step, outcome="repaired")
+            return evaluation
+        messages = messages + [AIMessage(content=text), HumanMessage(content=REPAIR_MESSAGE.format(error=error))]
+    metrics.STRUCTURED_OUTPUTS.inc(step=step, outcome="failed")
+    raise StructuredOutputError(f"No valid {step} output after {EVALUATION_REPAIR_ATTEMPTS + 1} attempts: {error}")
+
+COMPACTION_TOP_K = int(os.getenv("COMPACTION_TOP_K", "8"))
+COMPACTION_TOKEN_BUDGET = int(os.getenv("COMPACTION_TOKEN_BUDGET", "1200"))
+
+async def web_searcher(state: AgentState):
+    from langchain_core.callbacks.manager import adispatch_custom_event
+    response = await call_llm(
+        query_batcher,
         [
             SystemMessage(content=WEB_SEARCHER_INSTRUCTION),
             HumanMessage(content=WEB_SEARCHER_MESSAGE.format(tv_show_name=state["tv_show_name"],guess=state["guess"]))
-        ]
+        ],
+        "query",
     )
     # We return a list, because this will get added to the existing list
     queries = [line.strip() for line in response.content.split("\n") if line.strip()]
-    for query in queries:
-        search_results = web_search(query)
-        state["search_results"] = state.get("search_results", "") + f"\nSearch results for '{query}':\n{search_results}\n"
-    return {"messages": [HumanMessage(content="Here is some additional information, web search results, on the TV series that may be related to the guess:\n"+state["search_results"])]}
+    recording.record("queries", *queries)
+    await adispatch_custom_event("queries_generated", {"queries": queries})
 
-def call_model(state: AgentState):
-    response = model_with_structured_output.invoke(state["messages"])
+    async def report_search(query, snippets):
+        await adispatch_custom_event("search_completed", {"query": query, "ok": snippets is not None, "results": len(snippets or [])})
+    seen = set()
+    snippets = dedupe_snippets(state.get("plot_snippets", []), seen)
+    snippets += dedupe_snippets(await asyncio.to_thread(show_knowledge, state["tv_show_name"]), seen)
+    for query, results in await run_searches(state["tv_show_name"], queries, report_search):
+        snippets += dedupe_snippets(results, seen)
+    # Only the most relevant snippets within the budget reach the evaluation prompt
+    snippets, compaction_stats = compact_snippets(
+        snippets, f"{state['tv_show_name']} {state['guess']}", COMPACTION_TOP_K, COMPACTION_TOKEN_BUDGET
+    )
+    metrics.PROMPT_TOKENS_SAVED.inc(compaction_stats["tokens_before"] - compaction_stats["tokens_after"])
+    await adispatch_custom_event("context_compacted", compaction_stats)
+    search_results = state.get("search_results", "") + format_snippets(snippets)
+    return {
+        "search_results": search_results,
+        "messages": [HumanMessage(content="Here is some additional information, web search results, on the TV series that may be related to the guess:\n"+search_results)]
+    }
 
-    return {"final_response": response}
+async def call_model(state: AgentState):
+    response = await call_structured(evaluation_batcher, state["messages"], "evaluation")
+
+    return {"final_response": response, "route": state.get("route") or "search"}
+
+# Episode and season summaries indexed offline with `python plot_index.py build`.
+# When the best summary is close enough to the guess, the web search is skipped
+plot_index = PlotIndex(os.getenv("PLOT_INDEX_DIR", "plot_index"))
+PLOT_INDEX_TOP_K = int(os.getenv("PLOT_INDEX_TOP_K", "5"))
+PLOT_INDEX_STRONG_SIMILARITY = float(os.getenv("PLOT_INDEX_STRONG_SIMILARITY", "0.45"))
+
+def plot_context(tv_show_name: str, guess: str) -> tuple[list[dict], bool]:
+    """Plot index snippets for a guess and whether they are strong enough to stand in for a web search."""
+    hits = plot_index.search(tv_show_name, guess, PLOT_INDEX_TOP_K)
+    # Similarity rather than the blended score, which BM25 inflates for the show's own name
+    strong = bool(hits) and hits[0]["similarity"] >= PLOT_INDEX_STRONG_SIMILARITY
+    return [as_snippet(tv_show_name, hit) for hit in hits], strong
+
+async def plot_lookup(state: AgentState):
+    from langchain_core.callbacks.manager import adispatch_custom_event
+    snippets, strong = await asyncio.to_thread(plot_context, state["tv_show_name"], state["guess"])
+    await adispatch_custom_event("plot_index_searched", {"results": len(snippets), "strong": strong})
+    if not strong:
+        return {"plot_snippets": snippets}
+    search_results = format_snippets(snippets)
+    return {
+        "plot_snippets": snippets,
+        "search_results": search_results,
+        "route": "plot_index",
+        "messages": [HumanMessage(content="Here is some additional information, episode and season summaries of the TV series that may be related to the guess:\n"+search_results)]
+    }
+
+def route_after_plot_lookup(state: AgentState):
+    return "agent" if state.get("route") == "plot_index" else "web_searcher"
+
+# The direct answer is kept only when the model is confident and, for a correct
+# guess, can place it in the show; otherwise the search path takes over
+ADAPTIVE_ROUTING = os.getenv("ADAPTIVE_ROUTING", "true").lower() == "true"
+DIRECT_CONFIDENCE_THRESHOLD = float(os.getenv("DIRECT_CONFIDENCE_THRESHOLD", "0.85"))
+
+async def direct_evaluation(state: AgentState):
+    try:
+        response = await call_structured(direct_batcher, state["messages"], "direct")
+    except StructuredOutputError as e:
+        print(f"Direct evaluation failed, falling back to search: {e}")
+        return {}
+    if response.confidence < DIRECT_CONFIDENCE_THRESHOLD or (response.is_correct and not response.time):
+        return {}
+    return {"final_response": response, "route": "direct"}
+
+def route_after_direct(state: AgentState):
+    return END if state.get("final_response") else "plot_index"
+
+# Latency of full graph runs per route, to tune DIRECT_CONFIDENCE_THRESHOLD
+route_stats = {}
+
+def record_route(route: str, seconds: float):
+    stats = route_stats.setdefault(route, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+    stats["count"] += 1
+    stats["total_seconds"] += seconds
+    stats["max_seconds"] = max(stats["max_seconds"], seconds)
+    metrics.REQUEST_SECONDS.observe(seconds, route=route)
 
 
 # # Define the function that responds to the user
@@ -156,32 +519,59 @@ def call_model(state: AgentState):
 
 
 # Define a new graph
-workflow = StateGraph(AgentState)
-
-# Define the two nodes we will cycle between
-workflow.add_node("agent", call_model)
-workflow.add_node("web_searcher", web_searcher)
-
-# Set the entrypoint as `agent`
-# This means that this node is the first one called
-workflow.set_entry_point("web_searcher")
-
-workflow.add_edge("web_searcher", "agent")
-
-workflow.add_edge("agent", END)
-# # We now add a conditional edge
-# workflow.add_conditional_edges(
-#     "agent",
-#     should_continue,
-#     {
-#         "continue": "tools",
-#         "respond": "respond",
-#     },
-# )
+def build_graph():
+    workflow = StateGraph(AgentState)
+
+    # Define the nodes of the pipeline
+    workflow.add_node("agent", metrics.timed_node("agent", call_model))
+    workflow.add_node("web_searcher", metrics.timed_node("web_searcher", web_searcher))
+    workflow.add_node("direct", metrics.timed_node("direct", direct_evaluation))
+    workflow.add_node("plot_index", metrics.timed_node("plot_index", plot_lookup))
+
+    # Try a cheap direct evaluation first and only search when it is not good enough
+    if ADAPTIVE_ROUTING:
+        workflow.set_entry_point("direct")
+        workflow.add_conditional_edges("direct", route_after_direct, ["plot_index", END])
+    else:
+        workflow.set_entry_point("plot_index")
+
+    # The local plot index answers first; the web is only searched when it has no strong match
+    workflow.add_conditional_edges("plot_index", route_after_plot_lookup, ["agent", "web_searcher"])
+    workflow.add_edge("web_searcher", "agent")
+
+    workflow.add_edge("agent", END)
+    # # We now add a conditional edge
+    # workflow.add_conditional_edges(
+    #     "agent",
+    #     should_continue,
+    #     {
+    #         "continue": "tools",
+    #         "respond": "respond",
+    #     },
+    # )
 
-# workflow.add_edge("tools", "agent")
-# workflow.add_edge("respond", END)
-graph = workflow.compile()
+    # workflow.add_edge("tools", "agent")
+    # workflow.add_edge("respond", END)
+    return workflow.compile()
+
+# Compiled lazily by ensure_graph, so importing this module stays cheap
+graph = None
+graph_lock = asyncio.Lock()
+
+def init_graph():
+    """Build the chat models, unless configure_models already bound some, and compile the graph."""
+    global graph
+    if not chat_models:
+        configure_models(build_chat_models())
+    graph = build_graph()
+
+async def ensure_graph():
+    """Build the graph on first use; concurrent callers wait for the same build."""
+    if graph is None:
+        async with graph_lock:
+            if graph is None:
+                await asyncio.to_thread(init_graph)
+    return graph
 
 
 # response = graph.invoke(input={
@@ -195,6 +585,30 @@ graph = workflow.compile()
 # )
 
 
+# Counter and feedback live in an append-only SQLite store shared by all workers
+store = Store(STORE_PATH)
+store.import_legacy()
+# A no-op when the shared state lives in the store file; seeds Redis from it otherwise
+shared_state.seed_counter("evaluations", store.get_counter("evaluations"))
+
+async def increment_count():
+    await asyncio.to_thread(shared_state.incr, "evaluations")
+
+result_cache = ResultCache(
+    os.getenv("RESULT_CACHE_PATH", "result_cache.db"),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "50000")),
+)
+# Catches paraphrased guesses that miss the exact-key cache; every worker on the host
+# appends to and reads from the same SQLite file
+semantic_cache = SemanticCache(
+    os.getenv("SEMANTIC_CACHE_PATH", "semantic_cache.db"),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600))),
+    max_loaded_shows=int(os.getenv("SEMANTIC_CACHE_MAX_SHOWS", "256")),
+)
+
+
 class GuessRequest(BaseModel):
     tv_show_name: str
     guess: str
@@ -223,31 +637,135 @@ async def submit_feedback(request: FeedbackRequest):
         "feedback": request.feedback
     }
     
-    # Save to file (append to existing feedback)
-    feedback_file = "feedback.json"
+    # Append to the feedback store
     try:
-        # Read existing feedback
-        if os.path.exists(feedback_file):
-            with open(feedback_file, 'r', encoding='utf-8') as f:
-                feedback_data = json.load(f)
-        else:
-            feedback_data = []
-        
-        # Add new feedback
-        feedback_data.append(feedback_entry)
-        
-        # Write back to file
-        with open(feedback_file, 'w', encoding='utf-8') as f:
-            json.dump(feedback_data, f, indent=2, ensure_ascii=False)
-            
+        await asyncio.to_thread(store.add_feedback, feedback_entry)
     except Exception as e:
-        print(f"Error saving feedback to file: {e}")
+        print(f"Error saving feedback: {e}")
         # Continue anyway - don't fail the request if file saving fails
     
     return {"message": "Feedback received successfully", "status": "success"}
 
+FALLBACK_EVALUATION = PlotGuessEvaluation(
+    is_correct=False,
+    accuracy=0.0,
+    time=None,
+    explanation="Could not evaluate the guess due to an error. Please try again later.",
+    confidence=0.0
+)
+
+def build_input(tv_show_name: str, guess: str) -> dict:
+    return {
+        "tv_show_name":tv_show_name,
+        "guess":guess,
+        "messages": [
+                SystemMessage(content=SYSTEM_MESSAGE),
+                HumanMessage(content=USER_MESSAGE.format(tv_show_name=tv_show_name, guess=guess))
+            ]
+    }
+
+def shared_result_key(tv_show_name: str, guess: str) -> str:
+    return "result:" + json.dumps(ResultCache.key(tv_show_name, guess))
+
+async def lookup_cached(tv_show_name: str, guess: str):
+    """Return a cached evaluation from the exact, semantic or shared cache, or None."""
+    cached = await asyncio.to_thread(result_cache.get, tv_show_name, guess)
+    if cached is not None:
+        return cached
+    cached = await asyncio.to_thread(semantic_cache.get, tv_show_name, guess)
+    if cached is None and SHARED_RESULT_CACHE:
+        published = await asyncio.to_thread(shared_state.cache_get, shared_result_key(tv_show_name, guess))
+        cached = json.loads(published) if published is not None else None
+    if cached is not None:
+        await asyncio.to_thread(result_cache.set, tv_show_name, guess, cached)
+    return cached
+
+async def store_result(tv_show_name: str, guess: str, result: dict):
+    await asyncio.to_thread(result_cache.set, tv_show_name, guess, result)
+    await asyncio.to_thread(semantic_cache.add, tv_show_name, guess, result)
+    if SHARED_RESULT_CACHE:
+        await asyncio.to_thread(
+            shared_state.cache_set, shared_result_key(tv_show_name, guess), json.dumps(result), result_cache.ttl
+        )
+
+# Optional JSONL log with one trace (node timings, route, latency) per graph run
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+# Optional gzip JSONL archive of whole runs (trace plus queries, search results and LLM
+# inputs and outputs) that replay.py can run the graph against offline
+CAPTURE_PATH = os.getenv("CAPTURE_PATH")
+
+def start_trace(tv_show_name: str, guess: str):
+    if TRACE_LOG_PATH or CAPTURE_PATH:
+        trace = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "tv_show_name": tv_show_name,
+            "guess": guess,
+            "nodes": [],
+        }
+        if CAPTURE_PATH:
+            trace.update({field: [] for field in recording.CAPTURE_FIELDS})
+        metrics.current_trace.set(trace)
+
+async def finish_trace(route, seconds: float):
+    trace = metrics.current_trace.get()
+    if trace is not None:
+        trace.update(route=route, seconds=round(seconds, 4))
+        if TRACE_LOG_PATH:
+            summary = {key: value for key, value in trace.items() if key not in recording.CAPTURE_FIELDS}
+            await asyncio.to_thread(metrics.write_trace, TRACE_LOG_PATH, summary)
+        if CAPTURE_PATH:
+            await asyncio.to_thread(recording.write_capture, CAPTURE_PATH, trace)
+
+async def run_evaluation(tv_show_name: str, guess: str) -> dict:
+    """Run the graph for a guess and store the result in the caches."""
+    await ensure_graph()
+    input_data = build_input(tv_show_name, guess)
+    start_trace(tv_show_name, guess)
+    started = time.perf_counter()
+
+    # Failing LLM steps are repaired inside their node, so the graph is not rerun
+    try:
+        response = await graph.ainvoke(input=input_data)
+    except (GraphRecursionError, StructuredOutputError) as e:
+        print(f"Evaluation failed: {e}")
+        await finish_trace(None, time.perf_counter() - started)
+        return FALLBACK_EVALUATION.model_dump()
+    record_route(response["route"], time.perf_counter() - started)
+
+    await finish_trace(response["route"], time.perf_counter() - started)
+    result = response["final_response"].model_dump()
+    await store_result(tv_show_name, guess, result)
+    return result
+
+# Identical guesses arriving while one is being evaluated share its graph run
+evaluations = SingleFlight(shared_state if SHARED_SINGLE_FLIGHT else None)
+
+# Per-client and global admission control in front of the graph
+admission = AdmissionController(
+    global_rate=float(os.getenv("GLOBAL_RATE_PER_SEC", "5")),
+    global_burst=float(os.getenv("GLOBAL_BURST", "20")),
+    client_rate=float(os.getenv("CLIENT_RATE_PER_MIN", "10")) / 60,
+    client_burst=float(os.getenv("CLIENT_BURST", "5")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "50")),
+    max_queue_wait=float(os.getenv("ADMISSION_MAX_WAIT", "10")),
+    shared=limiter_state,
+)
+# Set to true behind a proxy that sets X-Forwarded-For, otherwise every user shares the
+# proxy's client bucket; keep false if clients can reach the app directly and spoof it
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+def client_ip(http_request: Request) -> str:
+    forwarded = http_request.headers.get("x-forwarded-for")
+    if TRUST_FORWARDED_FOR and forwarded:
+        return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+def too_many_requests(error: RateLimited) -> HTTPException:
+    retry_after = max(1, int(error.retry_after + 0.999))
+    return HTTPException(status_code=429, detail="High demand, please try again shortly.", headers={"Retry-After": str(retry_after)})
+
 @app.post("/evaluate-guess")
-async def evaluate_guess(request: GuessRequest) -> PlotGuessEvaluation:
+async def evaluate_guess(request: GuessRequest, http_request: Request) -> PlotGuessEvaluation:
     """
     Endpoint to evaluate a guess about a TV show plot.
     
@@ -257,38 +775,506 @@ async def evaluate_guess(request: GuessRequest) -> PlotGuessEvaluation:
     
     Returns:
         PlotGuessEvaluation: The evaluation of the guess.
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header when the service or the provider is saturated.
     """
-    input_data = {
-        "tv_show_name":request.tv_show_name,
-        "guess":request.guess,
-        "messages": [
-                SystemMessage(content=SYSTEM_MESSAGE),
-                HumanMessage(content=USER_MESSAGE.format(tv_show_name=request.tv_show_name, guess=request.guess))
-            ]
-    }
+    await increment_count()
+
+    cached = await lookup_cached(request.tv_show_name, request.guess)
+    if cached is not None:
+        return cached
+
+    try:
+        await admission.admit(client_ip(http_request))
+        return await evaluations.do(
+            ResultCache.key(request.tv_show_name, request.guess),
+            lambda: run_evaluation(request.tv_show_name, request.guess),
+        )
+    except RateLimited as e:
+        raise too_many_requests(e)
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Progress events of the graph runs being streamed, per evaluation key, for every stream
+# waiting on that run (the one that started it and those coalesced onto it)
+stream_listeners = defaultdict(set)
+
+def publish(key, event: str, data):
+    for listener in stream_listeners.get(key, ()):
+        listener.put_nowait(sse_event(event, data))
+
+async def run_streamed_evaluation(tv_show_name: str, guess: str, key) -> dict:
+    """run_evaluation that also publishes each stage of the graph run to the streams on `key`."""
+    result = None
+    route = None
+    start_trace(tv_show_name, guess)
+    started = time.perf_counter()
+    try:
+        await ensure_graph()
+        async for event in graph.astream_events(build_input(tv_show_name, guess), version="v2"):
+            kind, name = event["event"], event["name"]
+            if kind == "on_custom_event":
+                publish(key, name, event["data"])
+            elif kind == "on_chain_start" and name == "direct":
+                publish(key, "direct_evaluation", {})
+            elif kind == "on_chain_start" and name == "web_searcher":
+                publish(key, "searching", {})
+            elif kind == "on_chain_start" and name == "agent":
+                publish(key, "model_started", {})
+            elif kind == "on_chain_end" and name in ("direct", "agent") and event["data"]["output"].get("final_response"):
+                output = event["data"]["output"]
+                result = output["final_response"].model_dump()
+                route = output["route"]
+                record_route(route, time.perf_counter() - started)
+    except RateLimited:
+        raise
+    except Exception as e:
+        print(f"Streaming evaluation failed: {e}")
+
+    await finish_trace(route, time.perf_counter() - started)
+    if result is None:
+        return FALLBACK_EVALUATION.model_dump()
+    await store_result(tv_show_name, guess, result)
+    return result
+
+async def stream_evaluation(tv_show_name: str, guess: str, cached=None):
+    """
+    Yield Server-Sent Events for each stage of an evaluation, ending with the result.
+
+    The run goes through the same single-flight as /evaluate-guess: a stream that joins a
+    run already in progress gets the events from then on, or only the result when the
+    run belongs to a plain request or another worker.
+    """
+    if cached is not None:
+        yield sse_event("result", cached)
+        return
+
+    key = ResultCache.key(tv_show_name, guess)
+    listener = asyncio.Queue()
+    stream_listeners[key].add(listener)
+    run = asyncio.ensure_future(evaluations.do(key, lambda: run_streamed_evaluation(tv_show_name, guess, key)))
+    try:
+        while not run.done():
+            next_event = asyncio.ensure_future(listener.get())
+            await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield next_event.result()
+            else:
+                next_event.cancel()
+        while not listener.empty():
+            yield listener.get_nowait()
+        try:
+            result = run.result()
+        except RateLimited as e:
+            yield sse_event("error", {"status": 429, "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            print(f"Streaming evaluation failed: {e}")
+            result = FALLBACK_EVALUATION.model_dump()
+        yield sse_event("result", result)
+    finally:
+        stream_listeners[key].discard(listener)
+        if not stream_listeners[key]:
+            del stream_listeners[key]
+        # Only this stream's wait is cancelled; the shared run carries on for the others
+        run.cancel()
+
+@app.post("/evaluate-guess/stream")
+async def evaluate_guess_stream(request: GuessRequest, http_request: Request):
+    """
+    Streaming variant of /evaluate-guess using Server-Sent Events.
     
-    with open("count.txt","r") as f:
-        count = int(f.read().strip())
-    count += 1
-    with open("count.txt","w") as f:
-        f.write(str(count))
+    Events, in order: direct_evaluation, then when the direct answer is not confident
+    enough searching, queries_generated, search_completed (one per query),
+    context_compacted and model_started, and finally result, whose data is the
+    PlotGuessEvaluation.
     
-    c = 0
-    while c < 3:
+    Args:
+        tv_show_name (str): Name of the TV show.
+        guess (str): The guess about the plot.
+    
+    Returns:
+        StreamingResponse: A text/event-stream of progress events.
+    """
+    await increment_count()
+    cached = await lookup_cached(request.tv_show_name, request.guess)
+    if cached is None:
         try:
-            response = graph.invoke(input=input_data)
-            break
-        except GraphRecursionError:
-            print("Recursion limit reached, retrying...")
-            c += 1
+            await admission.admit(client_ip(http_request))
+        except RateLimited as e:
+            raise too_many_requests(e)
+    return StreamingResponse(
+        stream_evaluation(request.tv_show_name, request.guess, cached),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def evaluate_job(tv_show_name: str, guess: str) -> dict:
+    """Evaluate a queued guess; provider throttling makes the job wait rather than fail."""
+    cached = await lookup_cached(tv_show_name, guess)
+    if cached is not None:
+        return cached
+    for attempt in range(5):
+        try:
+            return await evaluations.do(
+                ResultCache.key(tv_show_name, guess),
+                lambda: run_evaluation(tv_show_name, guess),
+            )
+        except RateLimited as e:
+            if attempt == 4:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+# Background jobs are persisted so a restart picks up where it left off
+job_runner = JobRunner(
+    JobStore(os.getenv("JOB_STORE_PATH", "jobs.db")),
+    evaluate_job,
+    clients.webhooks,
+    concurrency=int(os.getenv("JOB_CONCURRENCY", "4")),
+    max_queued=int(os.getenv("JOB_MAX_QUEUED", "1000")),
+    lease=float(os.getenv("JOB_LEASE_SECONDS", "120")),
+)
+
+class JobRequest(GuessRequest):
+    webhook_url: Optional[HttpUrl] = None
+
+    @field_validator("webhook_url")
+    @classmethod
+    def public_https_webhook(cls, url):
+        # Webhooks are sent from inside the deployment, so they must not reach its network
+        if url is not None:
+            check_webhook_url(str(url))
+        return url
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, http_request: Request):
+    """
+    Endpoint to queue a guess for evaluation in the background.
+    
+    Args:
+        tv_show_name (str): Name of the TV show.
+        guess (str): The guess about the plot.
+        webhook_url (str, optional): Public https URL that receives the finished job as a JSON POST.
+    
+    Returns:
+        dict: The job id and its status
+    
+    Raises:
+        HTTPException: 422 for a webhook URL that resolves to a non-public address, 429 when
+            the client or the job queue is over its limit.
+    """
+    webhook_url = str(request.webhook_url) if request.webhook_url else None
+    if webhook_url:
+        try:
+            await resolve_webhook(webhook_url)
+        except (UnsafeWebhook, OSError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid webhook_url: {e}")
+    try:
+        await admission.admit(client_ip(http_request))
+    except RateLimited as e:
+        raise too_many_requests(e)
+    if await job_runner.full():
+        raise HTTPException(status_code=429, detail="Too many queued jobs, please try again shortly.", headers={"Retry-After": "30"})
+    await increment_count()
+    job_id = await job_runner.submit(request.tv_show_name, request.guess, webhook_url)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Endpoint to poll a background evaluation.
+    
+    Args:
+        job_id (str): Id returned by POST /jobs.
+    
+    Returns:
+        dict: Job status (queued, running, done or failed) and, when done, the PlotGuessEvaluation under "result"
+    """
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def fetch_show_context(tv_show_name: str) -> list[dict]:
+    """Search the general knowledge queries for a show once, for reuse across many guesses."""
+    queries = [template.format(tv_show_name=tv_show_name) for template in KNOWLEDGE_QUERIES]
+    seen = set()
+    snippets = []
+    for _, results in await run_searches(tv_show_name, queries):
+        snippets += dedupe_snippets(results, seen)
+    return snippets
+
+async def evaluate_with_context(tv_show_name: str, guess: str, snippets: list[dict]) -> dict:
+    """Evaluate a guess against already fetched show context, skipping query generation and search."""
+    await ensure_graph()
+    cached = await lookup_cached(tv_show_name, guess)
+    if cached is not None:
+        return cached
+    plot_snippets, _ = await asyncio.to_thread(plot_context, tv_show_name, guess)
+    kept, _ = compact_snippets(plot_snippets + snippets, f"{tv_show_name} {guess}", COMPACTION_TOP_K, COMPACTION_TOKEN_BUDGET)
+    messages = build_input(tv_show_name, guess)["messages"] + [
+        HumanMessage(content="Here is some additional information, web search results, on the TV series that may be related to the guess:\n"+format_snippets(kept))
+    ]
+    response = await call_structured(evaluation_batcher, messages, "evaluation")
+    result = response.model_dump()
+    await store_result(tv_show_name, guess, result)
+    return result
+
+async def bulk_evaluate(items: list[dict], concurrency: int = 8, pace=None):
+    """
+    Evaluate many {"id", "tv_show_name", "guess"} items, fetching search context once per show
+    and running at most `concurrency` evaluations at a time. `pace`, if given, is awaited
+    before each evaluation.
+    Yields {"id", "tv_show_name", "guess", "result"} (or "error") as each one finishes.
+    """
+    groups = defaultdict(list)
+    for item in items:
+        groups[normalize_text(item["tv_show_name"])].append(item)
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = asyncio.Queue()
+
+    async def evaluate_item(item, snippets):
+        output = {"id": item["id"], "tv_show_name": item["tv_show_name"], "guess": item["guess"]}
+        async with semaphore:
+            try:
+                if pace is not None:
+                    await pace()
+                output["result"] = await evaluate_with_context(item["tv_show_name"], item["guess"], snippets)
+            except Exception as e:
+                output["error"] = str(e)
+        await finished.put(output)
+
+    async def evaluate_group(group):
+        try:
+            async with semaphore:
+                snippets = await fetch_show_context(group[0]["tv_show_name"])
+        except Exception as e:
+            print(f"Could not fetch context for {group[0]['tv_show_name']}: {e}")
+            snippets = []
+        await asyncio.gather(*(evaluate_item(item, snippets) for item in group))
+
+    tasks = [asyncio.ensure_future(evaluate_group(group)) for group in groups.values()]
+    try:
+        for _ in range(len(items)):
+            yield await finished.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+# Operator token for POST /bulk-evaluate; without one, bulk runs are only possible with bulk.py
+BULK_API_TOKEN = os.getenv("BULK_API_TOKEN", "")
+
+def parse_bulk_items(lines) -> list[dict]:
+    """Parse JSONL guess records, numbering the ones without an "id" by line."""
+    items = []
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
             continue
-    else:
-        return PlotGuessEvaluation(
-            is_correct=False,
-            accuracy=0.0,
-            time=None,
-            explanation="Could not evaluate the guess due to an error. Please try again later.",
-            confidence=0.0
-        )
-        
-    return response["final_response"].model_dump()
+        record = json.loads(line)
+        items.append({"id": record.get("id", number), "tv_show_name": record["tv_show_name"], "guess": record["guess"]})
+    return items
+
+@app.post("/bulk-evaluate")
+async def bulk_evaluate_endpoint(http_request: Request, concurrency: int = 8):
+    """
+    Endpoint to score many guesses in one pass, for operators.
+    
+    The request body is JSON lines with tv_show_name, guess and an optional id. Search
+    context is fetched once per show and guesses are evaluated concurrently, each one
+    charged to the global admission bucket.
+    
+    Args:
+        concurrency (int): Maximum number of evaluations in flight.
+    
+    Returns:
+        StreamingResponse: JSON lines with id, tv_show_name, guess and result (or error), in completion order.
+    
+    Raises:
+        HTTPException: 403 without "Authorization: Bearer <BULK_API_TOKEN>" (always, if no
+            token is configured), 429 when the caller is over its admission limit.
+    """
+    authorization = http_request.headers.get("authorization", "")
+    if not BULK_API_TOKEN or not hmac.compare_digest(authorization.encode(), f"Bearer {BULK_API_TOKEN}".encode()):
+        raise HTTPException(status_code=403, detail="Bulk evaluation needs an operator token; use bulk.py otherwise")
+    try:
+        await admission.admit(client_ip(http_request))
+    except RateLimited as e:
+        raise too_many_requests(e)
+    body = (await http_request.body()).decode("utf-8")
+    try:
+        items = parse_bulk_items(body.splitlines())
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL input: {e}")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} guesses per request")
+
+    async def lines():
+        async for output in bulk_evaluate(items, max(1, min(concurrency, 32)), admission.pace):
+            yield json.dumps(output, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# Series autocomplete is served from a local title index; OMDB is only asked about
+# prefixes the index cannot fill
+series_index = SeriesIndex(os.getenv("SERIES_INDEX_PATH", "series_titles.txt"))
+if os.getenv("SERIES_DATASET"):
+    series_index.load_dataset(os.getenv("SERIES_DATASET"))
+OMDB_API_KEY = os.getenv("OMDB_API_KEY")
+
+def warm_up_urls() -> list[str]:
+    urls = ["https://api.openai.com/v1/models"] if "openai" in chat_models else []
+    if OMDB_API_KEY:
+        urls.append("https://www.omdbapi.com/")
+    return urls
+
+# Autocomplete misses are forwarded to OMDB; this keeps one client from spending the OMDB quota
+omdb_admission = AdmissionController(
+    global_rate=float(os.getenv("OMDB_RATE_PER_SEC", "5")),
+    global_burst=float(os.getenv("OMDB_BURST", "20")),
+    client_rate=float(os.getenv("OMDB_CLIENT_RATE_PER_MIN", "30")) / 60,
+    client_burst=float(os.getenv("OMDB_CLIENT_BURST", "10")),
+    max_queue_wait=0,
+    shared=limiter_state,
+    name="omdb",
+)
+SERIES_QUERY_MAX_LENGTH = 100
+
+async def fetch_omdb_series(query: str) -> list[str]:
+    response = await clients.omdb.get("/", params={"apikey": OMDB_API_KEY, "s": query, "type": "series"})
+    data = response.json()
+    return list(dict.fromkeys(item["Title"] for item in data.get("Search", [])))
+
+@app.get("/series-suggestions")
+async def series_suggestions(http_request: Request, q: str = Query(max_length=SERIES_QUERY_MAX_LENGTH), limit: int = 5):
+    """
+    Endpoint for TV series autocomplete.
+    
+    Args:
+        q (str): What the user has typed so far, at most 100 characters.
+        limit (int): Maximum number of suggestions.
+    
+    Returns:
+        dict: Matching series titles under "suggestions". A client over its OMDB
+            lookup limit gets the local matches only.
+    """
+    limit = max(1, min(limit, 10))
+    cached = series_index.cached(q)
+    if cached is not None:
+        return {"suggestions": cached[:limit]}
+
+    suggestions = series_index.search(q, limit)
+    if len(suggestions) < limit and OMDB_API_KEY and q.strip():
+        try:
+            await omdb_admission.admit(client_ip(http_request))
+        except RateLimited:
+            return {"suggestions": suggestions}
+        try:
+            titles = await fetch_omdb_series(q.strip())
+        except Exception as e:
+            print(f"OMDB lookup failed for {q}: {e}")
+            return {"suggestions": suggestions}
+        for title in titles:
+            series_index.add(title)
+        suggestions = list(dict.fromkeys(suggestions + titles))[:limit]
+    series_index.remember(q, suggestions)
+    return {"suggestions": suggestions}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: fails with 503 until the models and graph have been built.
+    
+    Returns:
+        dict: {"status": "ready"} once evaluations can run without a cold start
+    """
+    if graph is None:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready"}
+
+
+@app.get("/stats")
+async def get_stats():
+    """
+    Endpoint exposing cache, coalescing, batching, rate limiting, routing and provider health counters for monitoring.
+    
+    Returns:
+        dict: Stats per cache
+    """
+    return {
+        "result_cache": await asyncio.to_thread(result_cache.stats),
+        "semantic_cache": await asyncio.to_thread(semantic_cache.stats),
+        "search_cache": await asyncio.to_thread(search_cache.stats),
+        "single_flight": evaluations.stats(),
+        "series_index": series_index.stats(),
+        "plot_index": plot_index.stats(),
+        "jobs": job_runner.stats(),
+        "query_batches": query_batcher.stats(),
+        "evaluation_batches": evaluation_batcher.stats(),
+        "direct_batches": direct_batcher.stats(),
+        "admission": admission.stats(),
+        "omdb_admission": omdb_admission.stats(),
+        "provider_limits": {name: limiter.stats() for name, limiter in provider_limiters.items()},
+        "providers": {
+            step: {name: health.stats() for name, health in step_router.health.items()}
+            for step, step_router in routers.items()
+        },
+        "routes": {
+            route: {**stats, "avg_seconds": stats["total_seconds"] / stats["count"]}
+            for route, stats in route_stats.items()
+        },
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus scrape endpoint with per-node and per-route latency histograms,
+    search latency and errors, LLM token usage and cost, cache, retry and queue metrics.
+    
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format
+    """
+    caches = {
+        "result": await asyncio.to_thread(result_cache.stats),
+        "semantic": await asyncio.to_thread(semantic_cache.stats),
+        "search": await asyncio.to_thread(search_cache.stats),
+    }
+    batchers = {"query": query_batcher, "evaluation": evaluation_batcher, "direct": direct_batcher}
+    lines = []
+    lines += metrics.render_gauges("cache_hits", "Cache hits since start", {
+        (("cache", name),): stats["hits"] for name, stats in caches.items()
+    })
+    lines += metrics.render_gauges("cache_misses", "Cache misses since start", {
+        (("cache", name),): stats["misses"] for name, stats in caches.items()
+    })
+    lines += metrics.render_gauges("evaluations_coalesced", "Requests that joined an in-flight evaluation", {
+        None: evaluations.coalesced
+    })
+    lines += metrics.render_gauges("admission_rejected", "Requests rejected by admission control", {
+        None: admission.rejected
+    })
+    lines += metrics.render_gauges("queue_depth", "Work currently waiting per queue", {
+        (("queue", "admission"),): admission.waiting,
+        (("queue", "in_flight_evaluations"),): evaluations.stats()["in_flight"],
+        (("queue", "web_search"),): search_executor._work_queue.qsize(),
+        (("queue", "jobs"),): job_runner.stats()["queued"],
+        **{(("queue", f"llm_batch_{name}"),): batcher.stats()["pending"] for name, batcher in batchers.items()},
+    })
+    lines += metrics.render_gauges("provider_error_rate", "Recent error rate per provider and step", {
+        (("provider", name), ("step", step)): health.error_rate()
+        for step, step_router in routers.items() for name, health in step_router.health.items()
+    })
+    lines += metrics.render_gauges("provider_p95_seconds", "Recent p95 latency per provider and step", {
+        (("provider", name), ("step", step)): health.percentile(0.95, 0.0)
+        for step, step_router in routers.items() for name, health in step_router.health.items()
+    })
+    return PlainTextResponse(metrics.render(lines), media_type="text/plain; version=0.0.4")
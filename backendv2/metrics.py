@@ -0,0 +1,161 @@
+"""
+Minimal in-process metrics with Prometheus text exposition, plus a LangChain callback
+that records LLM token usage and cost per model.
+"""
+import json
+import time
+import bisect
+import threading
+import contextvars
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+
+def _label_string(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{str(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_label_string(dict(key))} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            self.values[key] = (counts, total + value, count + 1)
+
+    def time(self, **labels):
+        histogram = self
+
+        class _Timer:
+            def __enter__(self):
+                self.started = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                self.seconds = time.perf_counter() - self.started
+                histogram.observe(self.seconds, **labels)
+
+        return _Timer()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            labels = dict(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_label_string({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_string({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_label_string(labels)} {total}")
+            lines.append(f"{self.name}_count{_label_string(labels)} {count}")
+        return lines
+
+
+def render_gauges(name: str, description: str, values: dict) -> list[str]:
+    """Render a gauge family from {labels tuple or None: value} collected at scrape time."""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+    for labels, value in values.items():
+        lines.append(f"{name}{_label_string(dict(labels or ()))} {value}")
+    return lines
+
+
+NODE_SECONDS = Histogram("graph_node_seconds", "Time spent in each graph node")
+REQUEST_SECONDS = Histogram("evaluation_seconds", "End to end evaluation latency by route")
+SEARCH_SECONDS = Histogram("web_search_seconds", "Latency of individual web searches")
+SEARCH_ERRORS = Counter("web_search_errors_total", "Web searches that failed or timed out")
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used per model and direction")
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend per model in USD")
+LLM_CALLS = Counter("llm_calls_total", "LLM calls per model")
+RETRIES = Counter("retries_total", "Retries by kind")
+PROMPT_TOKENS_SAVED = Counter("prompt_tokens_saved_total", "Estimated prompt tokens removed by search-context compaction")
+STRUCTURED_OUTPUTS = Counter(
+    "structured_outputs_total", "Structured LLM replies by step and outcome: valid, repaired locally, retried or failed"
+)
+
+# USD per million input / output tokens
+MODEL_PRICES = {
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+
+class UsageCallback(BaseCallbackHandler):
+    """Counts tokens and estimated cost from every chat model response."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def on_llm_end(self, response, **kwargs):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        LLM_CALLS.inc(model=self.model_name)
+        LLM_TOKENS.inc(input_tokens, model=self.model_name, direction="input")
+        LLM_TOKENS.inc(output_tokens, model=self.model_name, direction="output")
+        input_price, output_price = MODEL_PRICES.get(self.model_name, (0.0, 0.0))
+        LLM_COST.inc((input_tokens * input_price + output_tokens * output_price) / 1_000_000, model=self.model_name)
+
+
+# Per-request trace collected by the nodes of the current evaluation, if tracing is on
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def timed_node(name: str, fn):
+    """Wrap an async graph node so its duration lands in NODE_SECONDS and the request trace."""
+    async def wrapper(state):
+        with NODE_SECONDS.time(node=name) as timer:
+            result = await fn(state)
+        trace = current_trace.get()
+        if trace is not None:
+            trace["nodes"].append({"node": name, "seconds": round(timer.seconds, 4)})
+        return result
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def write_trace(path: str, trace: dict):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace, ensure_ascii=False) + "\n")
+
+
+def render(extra_lines: list[str] = ()) -> str:
+    lines = []
+    for metric in (NODE_SECONDS, REQUEST_SECONDS, SEARCH_SECONDS, SEARCH_ERRORS, LLM_TOKENS, LLM_COST, LLM_CALLS, RETRIES,
+                   PROMPT_TOKENS_SAVED, STRUCTURED_OUTPUTS):
+        lines += metric.render()
+    lines += extra_lines
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,166 @@
+"""
+Local retrieval index of season and episode summaries, queried before any web search.
+
+Built offline from a JSON lines dataset, one summary per line:
+
+    {"show": "House MD", "season": 8, "episode": 22, "title": "Everybody Dies", "summary": "..."}
+
+`episode` and `title` are optional (a season summary has neither). Each show gets its own
+directory with a memory-mapped .npy matrix of unit embeddings, a BM25 inverted index and
+the summaries themselves, so a query touches only that show's files.
+
+Usage:
+    python plot_index.py build summaries.jsonl --output plot_index
+"""
+import os
+import json
+import math
+import hashlib
+import argparse
+import threading
+from collections import Counter, defaultdict
+import numpy as np
+from cache import normalize_text, tokenize
+from semantic_cache import embed
+
+
+def show_directory(directory: str, tv_show_name: str) -> str:
+    return os.path.join(directory, hashlib.sha1(normalize_text(tv_show_name).encode()).hexdigest())
+
+
+def document_text(doc: dict) -> str:
+    return f"{doc.get('title') or ''} {doc['summary']}"
+
+
+def write_show(directory: str, tv_show_name: str, docs: list[dict]):
+    """Write the embedding matrix, inverted index and summaries of one show."""
+    path = show_directory(directory, tv_show_name)
+    os.makedirs(path, exist_ok=True)
+    terms = [tokenize(document_text(doc)) for doc in docs]
+    postings = defaultdict(list)
+    for doc_id, doc_terms in enumerate(terms):
+        for term, frequency in Counter(doc_terms).items():
+            postings[term].append([doc_id, frequency])
+    np.save(os.path.join(path, "embeddings.npy"), np.stack([embed(document_text(doc)) for doc in docs]))
+    with open(os.path.join(path, "bm25.json"), "w", encoding="utf-8") as f:
+        json.dump({"lengths": [len(doc_terms) for doc_terms in terms], "postings": postings}, f)
+    with open(os.path.join(path, "docs.json"), "w", encoding="utf-8") as f:
+        json.dump({"show": tv_show_name, "docs": docs}, f, ensure_ascii=False)
+
+
+def build(dataset: str, directory: str) -> dict:
+    """Index every show in a dataset; returns the number of summaries per show."""
+    shows = defaultdict(list)
+    with open(dataset, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                shows[record["show"]].append({key: record.get(key) for key in ("season", "episode", "title", "summary")})
+    for tv_show_name, docs in shows.items():
+        docs.sort(key=lambda doc: (doc["season"] or 0, doc["episode"] or 0))
+        write_show(directory, tv_show_name, docs)
+    return {tv_show_name: len(docs) for tv_show_name, docs in shows.items()}
+
+
+class PlotIndex:
+    """
+    Hybrid BM25 and embedding search over the indexed summaries of each show.
+
+    Shows are loaded lazily on first query; embeddings stay memory-mapped, so only the
+    pages a query touches are read from disk.
+    """
+
+    def __init__(self, directory: str, semantic_weight: float = 0.5, k1: float = 1.5, b: float = 0.75):
+        self.directory = directory
+        self.semantic_weight = semantic_weight
+        self.k1 = k1
+        self.b = b
+        self.queries = 0
+        self.hits = 0
+        self._shows = {}
+        self._lock = threading.Lock()
+
+    def _load(self, tv_show_name: str):
+        show_key = normalize_text(tv_show_name)
+        with self._lock:
+            if show_key not in self._shows:
+                path = show_directory(self.directory, tv_show_name)
+                if os.path.exists(os.path.join(path, "docs.json")):
+                    with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+                        docs = json.load(f)["docs"]
+                    with open(os.path.join(path, "bm25.json"), "r", encoding="utf-8") as f:
+                        bm25 = json.load(f)
+                    embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+                    self._shows[show_key] = (docs, bm25, embeddings)
+                else:
+                    self._shows[show_key] = None
+            return self._shows[show_key]
+
+    def _bm25(self, bm25: dict, query_terms: set, count: int) -> np.ndarray:
+        lengths = np.asarray(bm25["lengths"], dtype=np.float32)
+        avg_length = lengths.mean() or 1
+        scores = np.zeros(count, dtype=np.float32)
+        for term in query_terms:
+            postings = bm25["postings"].get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * lengths[doc_id] / avg_length))
+        return scores
+
+    def search(self, tv_show_name: str, query: str, top_k: int = 5) -> list[dict]:
+        """
+        Best matching summaries for a query, most relevant first.
+
+        Each hit carries the summary fields plus "score" (BM25, scaled to the best match,
+        blended with cosine similarity) and "similarity" (cosine alone), both in [0, 1].
+        """
+        self.queries += 1
+        show = self._load(tv_show_name)
+        if show is None:
+            return []
+        docs, bm25, embeddings = show
+        similarity = np.clip(embeddings @ embed(query), 0, 1)
+        lexical = self._bm25(bm25, set(tokenize(query)), len(docs))
+        if lexical.max() > 0:
+            lexical = lexical / lexical.max()
+        scores = self.semantic_weight * similarity + (1 - self.semantic_weight) * lexical
+        ranked = np.argsort(-scores)[:top_k]
+        hits = [{**docs[i], "score": float(scores[i]), "similarity": float(similarity[i])} for i in ranked if scores[i] > 0]
+        self.hits += bool(hits)
+        return hits
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = [show for show in self._shows.values() if show is not None]
+        return {
+            "queries": self.queries,
+            "queries_with_hits": self.hits,
+            "loaded_shows": len(loaded),
+            "loaded_summaries": sum(len(docs) for docs, _, _ in loaded),
+        }
+
+
+def as_snippet(tv_show_name: str, hit: dict) -> dict:
+    """Shape a hit like a web search result, labelled with where it happens in the show."""
+    where = f"Season {hit['season']}" if hit.get("season") is not None else "Unknown season"
+    if hit.get("episode") is not None:
+        where += f", episode {hit['episode']}"
+    title = f"{tv_show_name} ({where})" + (f" - {hit['title']}" if hit.get("title") else "")
+    return {"title": title, "body": hit["summary"]}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_command = commands.add_parser("build", help="Index a JSON lines dataset of summaries")
+    build_command.add_argument("dataset")
+    build_command.add_argument("--output", default=os.getenv("PLOT_INDEX_DIR", "plot_index"))
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    counts = build(args.dataset, args.output)
+    print(f"Indexed {sum(counts.values())} summaries for {len(counts)} shows into {args.output}")
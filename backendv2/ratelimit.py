@@ -0,0 +1,207 @@
+import time
+import random
+import asyncio
+from collections import OrderedDict
+
+
+class RateLimited(Exception):
+    """Raised when a request cannot be admitted; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take `amount` tokens and return 0, or return how many seconds until they would be available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (min(amount, self.capacity) - self.tokens) / self.rate
+
+
+async def acquire_buckets(buckets: list[tuple[TokenBucket, float]], max_wait: float):
+    """
+    Wait until every (bucket, amount) pair can be satisfied, or raise RateLimited when
+    that would take longer than `max_wait` seconds. Tokens are only taken when all fit.
+    """
+    deadline = time.monotonic() + max_wait
+    while True:
+        waits = [bucket.try_acquire(amount) for bucket, amount in buckets]
+        if not any(waits):
+            return
+        # Give back whatever was taken so a partial grant does not leak tokens
+        for (bucket, amount), wait in zip(buckets, waits):
+            if not wait:
+                bucket.tokens += amount
+        wait = max(waits)
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(wait)
+        await asyncio.sleep(wait)
+
+
+async def acquire_shared(shared, buckets: list[tuple[str, float, float, float]], max_wait: float):
+    """acquire_buckets for (key, rate, capacity, amount) buckets kept in a SharedState, taken in one round trip."""
+    deadline = time.monotonic() + max_wait
+    while True:
+        wait = await asyncio.to_thread(shared.take_tokens, buckets)
+        if not wait:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(wait)
+        await asyncio.sleep(wait)
+
+
+class AdmissionController:
+    """
+    Admission control in front of the graph: one global bucket plus one bucket per client IP.
+
+    Requests that cannot be admitted immediately wait in a bounded queue for at most
+    `max_queue_wait` seconds; beyond `max_queue` waiters they are rejected straight away.
+    With a SharedState the buckets are shared by all workers under `name`; the queue stays per process.
+    """
+
+    def __init__(self, global_rate: float, global_burst: float, client_rate: float, client_burst: float,
+                 max_queue: int = 50, max_queue_wait: float = 10, max_clients: int = 10000, shared=None,
+                 name: str = "admission"):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.max_clients = max_clients
+        self.shared = shared
+        self.name = name
+        self._clients = OrderedDict()
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.paced = 0
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.pop(client, None) or TokenBucket(self.client_rate, self.client_burst)
+        self._clients[client] = bucket
+        if len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+        return bucket
+
+    async def admit(self, client: str):
+        max_wait = self.max_queue_wait if self.waiting < self.max_queue else 0
+        self.waiting += 1
+        try:
+            if self.shared is None:
+                await acquire_buckets([(self._client_bucket(client), 1), (self.global_bucket, 1)], max_wait)
+            else:
+                await acquire_shared(self.shared, [
+                    (f"{self.name}:client:{client}", self.client_rate, self.client_burst, 1),
+                    (f"{self.name}:global", self.global_rate, self.global_burst, 1),
+                ], max_wait)
+        except RateLimited:
+            self.rejected += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.admitted += 1
+
+    async def pace(self):
+        """
+        Take one token from the global bucket, waiting as long as it takes. Bulk work calls
+        this per item, so it runs at most at the global rate and interactive requests keep
+        getting their share of it.
+        """
+        while True:
+            if self.shared is None:
+                wait = self.global_bucket.try_acquire(1)
+            else:
+                wait = await asyncio.to_thread(
+                    self.shared.take_tokens, [(f"{self.name}:global", self.global_rate, self.global_burst, 1)]
+                )
+            if not wait:
+                self.paced += 1
+                return
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {"admitted": self.admitted, "rejected": self.rejected, "waiting": self.waiting, "paced": self.paced}
+
+
+class ProviderLimiter:
+    """
+    Keeps calls to one model provider under its requests-per-minute and tokens-per-minute quotas.
+    With a SharedState the quota is tracked across all workers under `name`.
+    """
+
+    def __init__(self, rpm: float, tpm: float, max_wait: float = 30, shared=None, name: str = "provider"):
+        self.requests = TokenBucket(rpm / 60, rpm)
+        self.tokens = TokenBucket(tpm / 60, tpm)
+        self.max_wait = max_wait
+        self.shared = shared
+        self.name = name
+        self.throttled = 0
+
+    async def acquire(self, estimated_tokens: int):
+        try:
+            amount = min(estimated_tokens, self.tokens.capacity)
+            if self.shared is None:
+                await acquire_buckets([(self.requests, 1), (self.tokens, amount)], self.max_wait)
+            else:
+                await acquire_shared(self.shared, [
+                    (f"provider:{self.name}:requests", self.requests.rate, self.requests.capacity, 1),
+                    (f"provider:{self.name}:tokens", self.tokens.rate, self.tokens.capacity, amount),
+                ], self.max_wait)
+        except RateLimited:
+            self.throttled += 1
+            raise
+
+    def stats(self) -> dict:
+        return {"throttled": self.throttled}
+
+
+def estimate_tokens(messages, completion_tokens: int = 500) -> int:
+    """Rough token count of a prompt (about four characters per token) plus the expected completion."""
+    return sum(len(str(message.content)) for message in messages) // 4 + completion_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider throttling errors (OpenAI RateLimitError, Gemini RESOURCE_EXHAUSTED / HTTP 429)."""
+    if type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return True
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "Too Many Requests" in message
+
+
+async def with_backoff(fn, attempts: int = 4, base: float = 0.5, cap: float = 8.0, on_retry=None):
+    """
+    Await `fn()` and retry provider rate-limit errors with exponential backoff and full jitter.
+    After the last attempt the error is re-raised as RateLimited. `on_retry()` is called
+    before each retry.
+    """
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            if attempt == attempts - 1:
+                raise RateLimited(max(delay, base)) from e
+            print(f"Provider rate limited, retrying in {delay:.2f}s")
+            if on_retry:
+                on_retry()
+            await asyncio.sleep(delay)
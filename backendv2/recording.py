@@ -0,0 +1,40 @@
+"""
+Capture of graph runs for offline replay with replay.py.
+
+With CAPTURE_PATH set, each evaluation's trace also collects the generated queries, the
+raw search results and every LLM input and output, and the finished trace is appended
+to a gzip-compressed JSON lines archive.
+"""
+import gzip
+import json
+import threading
+import metrics
+
+CAPTURE_FIELDS = ("queries", "searches", "llm_calls")
+
+_write_lock = threading.Lock()
+
+
+def record(kind: str, *items):
+    """Add items to the capture of the current evaluation, if it is being captured."""
+    trace = metrics.current_trace.get()
+    if trace is not None and kind in trace:
+        trace[kind].extend(items)
+
+
+def write_capture(path: str, capture: dict):
+    # Every append is its own gzip member; readers see one continuous stream
+    line = json.dumps(capture, ensure_ascii=False) + "\n"
+    with _write_lock, gzip.open(path, "at", encoding="utf-8") as f:
+        f.write(line)
+
+
+def read_captures(path: str):
+    """Yield captured runs in order, stopping at a member truncated by a crash."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            print(f"{path} ends with a truncated capture, ignoring it")
@@ -0,0 +1,244 @@
+"""
+Replay captured graph runs offline, without calling any LLM provider or search engine.
+
+Runs recorded with CAPTURE_PATH set are sent through /evaluate-guess again in-process.
+The chat model and ddgs.DDGS are swapped for stand-ins that answer from the capture and
+wait for the recorded latency scaled by --speed. Prompt, compaction and caching changes
+can then be measured against the same traffic, run against run. Stores start empty in
+a scratch directory, as in bench.py.
+
+Usage:
+    python replay.py captures.jsonl.gz --concurrency 20 --speed 1 --output replay.json
+    python replay.py captures.jsonl.gz --speed 0 --baseline replay.json
+
+--speed 2 replays twice as fast (arrival gaps and recorded latencies halved); --speed 0
+skips all waiting. Requests arrive at their recorded pace unless --concurrency is the
+tighter limit.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+from collections import Counter
+from bench import FakeMessage, setup_environment, monitor_event_loop, percentile, summarize, git_commit
+from recording import read_captures
+
+
+class Replay:
+    """Recorded LLM answers of one captured run, handed out in call order per stream."""
+
+    def __init__(self, capture: dict):
+        self.capture = capture
+        self.streams = {"query": [], "structured": []}
+        for call in capture.get("llm_calls", []):
+            self.streams["query" if call["step"] == "query" else "structured"].append(call)
+        self.cursors = Counter()
+
+    def matches(self, text: str) -> bool:
+        return self.capture["guess"] in text and self.capture["tv_show_name"] in text
+
+    def next_call(self, stream: str):
+        calls = self.streams[stream]
+        if not calls:
+            return None
+        # A run that now makes more calls than were recorded keeps getting the last answer
+        call = calls[min(self.cursors[stream], len(calls) - 1)]
+        self.cursors[stream] += 1
+        return call
+
+
+class ReplaySession:
+    """Runs currently being replayed, so a model call can be traced back to its capture."""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self.active = {}
+        self.searches = {}
+        self.unmatched_llm_calls = 0
+        self.unrecorded_searches = 0
+
+    def find(self, messages):
+        text = "\n".join(str(message.content) for message in messages)
+        return next((replay for replay in self.active.values() if replay.matches(text)), None)
+
+    async def wait(self, seconds: float):
+        if self.speed > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+
+class ReplayRunnable:
+    def __init__(self, session: ReplaySession, stream: str, schema=None):
+        self.session = session
+        self.stream = stream
+        self.schema = schema
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        replay = self.session.find(input)
+        call = replay.next_call(self.stream) if replay else None
+        if call is None:
+            self.session.unmatched_llm_calls += 1
+            raise RuntimeError("No recorded LLM answer for this call")
+        await self.session.wait(call["seconds"])
+        output = call["output"]
+        if self.schema is None:
+            return FakeMessage(output["content"])
+        parsed = self.schema(**output["parsed"]) if output["parsed"] is not None else None
+        return {
+            "raw": FakeMessage(output["raw"]),
+            "parsed": parsed,
+            "parsing_error": None if parsed is not None else ValueError("Recorded reply failed validation"),
+        }
+
+    async def abatch(self, inputs, config=None, return_exceptions=False, **kwargs):
+        return await asyncio.gather(*(self.ainvoke(input) for input in inputs), return_exceptions=return_exceptions)
+
+
+class ReplayChatModel(ReplayRunnable):
+    def __init__(self, session: ReplaySession):
+        super().__init__(session, "query")
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        return ReplayRunnable(self.session, "structured", schema)
+
+
+def replay_ddgs(session: ReplaySession):
+    """ddgs.DDGS stand-in answering from the recorded searches; it blocks its pool thread like the real one."""
+    class ReplayDDGS:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def text(self, query, max_results=3, **kwargs):
+            search = session.searches.get(query)
+            if search is None:
+                session.unrecorded_searches += 1
+                return []
+            if session.speed > 0:
+                time.sleep(search["seconds"] / session.speed)
+            if search["results"] is None:
+                raise RuntimeError("Recorded search failure")
+            return search["results"][:max_results]
+
+    return ReplayDDGS
+
+
+def arrival_offsets(captures: list[dict]) -> list[float]:
+    """Seconds from the first capture to each capture's recorded start."""
+    times = [datetime.datetime.fromisoformat(capture["timestamp"]).timestamp() for capture in captures]
+    return [max(0.0, t - times[0]) for t in times] if times else []
+
+
+async def drive(main, captures: list[dict], session: ReplaySession, concurrency: int) -> dict:
+    import httpx
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    offsets = arrival_offsets(captures)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=300) as client:
+        async def replay_one(index: int, capture: dict):
+            nonlocal errors
+            await session.wait(offsets[index])
+            async with semaphore:
+                session.active[index] = Replay(capture)
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/evaluate-guess", json={"tv_show_name": capture["tv_show_name"], "guess": capture["guess"]}
+                    )
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                finally:
+                    del session.active[index]
+                latencies.append(time.perf_counter() - started)
+                errors += 0 if ok else 1
+
+        lag_samples = []
+        monitor = asyncio.ensure_future(monitor_event_loop(lag_samples))
+        started = time.perf_counter()
+        await asyncio.gather(*(replay_one(index, capture) for index, capture in enumerate(captures)))
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+
+    return {
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(captures) / elapsed if elapsed else 0.0,
+        "latency": {**summarize(latencies), "errors": errors},
+        "routes": {route: stats["count"] for route, stats in main.route_stats.items()},
+        "event_loop": {"max_lag": max(lag_samples, default=0.0), "p99_lag": percentile(lag_samples, 0.99)},
+        "prompt_tokens_saved": sum(main.metrics.PROMPT_TOKENS_SAVED.values.values()),
+        "structured_outputs": {
+            ",".join(f"{name}={value}" for name, value in labels): count
+            for labels, count in main.metrics.STRUCTURED_OUTPUTS.values.items()
+        },
+        "unmatched_llm_calls": session.unmatched_llm_calls,
+        "unrecorded_searches": session.unrecorded_searches,
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Relative change of the headline numbers against an earlier replay report."""
+    before = baseline["results"]
+
+    def change(new, old):
+        return round((new - old) / old, 4) if old else None
+
+    return {
+        "requests_per_second": change(results["requests_per_second"], before["requests_per_second"]),
+        **{key: change(results["latency"][key], before["latency"][key]) for key in ("p50", "p95", "p99")},
+        "prompt_tokens_saved": change(results["prompt_tokens_saved"], before["prompt_tokens_saved"]),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", help="gzip JSONL archive written with CAPTURE_PATH")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale for arrivals and latencies; 0 skips waiting")
+    parser.add_argument("--limit", type=int, help="Replay only the first N captures")
+    parser.add_argument("--baseline", help="Earlier replay report to compare against")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    captures = [capture for capture in read_captures(args.captures) if capture.get("llm_calls") is not None]
+    captures = captures[:args.limit] if args.limit else captures
+    session = ReplaySession(args.speed)
+    for capture in captures:
+        for search in capture["searches"]:
+            session.searches.setdefault(search["query"], search)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_environment(args, workdir)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import main as app_main
+        import ddgs
+
+        app_main.configure_models({"openai": ReplayChatModel(session)})
+
+        ddgs.DDGS = replay_ddgs(session)
+        results = asyncio.run(drive(app_main, captures, session, args.concurrency))
+
+    report = {"commit": git_commit(), "config": vars(args), "captures": len(captures), "results": results}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["change_vs_baseline"] = compare(results, json.load(f))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
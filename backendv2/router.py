@@ -0,0 +1,134 @@
+import time
+import asyncio
+from collections import deque
+from ratelimit import estimate_tokens, is_rate_limit_error
+
+
+class ProviderHealth:
+    """
+    Rolling window of latencies and outcomes for one provider.
+
+    Outcomes older than error_window seconds no longer count towards the error rate, so a
+    provider demoted after a short outage is ranked on its latency again once they expire.
+    """
+
+    def __init__(self, window: int = 100, error_window: float = 60.0):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.error_window = error_window
+        self.calls = 0
+        self.errors = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float, ok: bool):
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.outcomes.append((time.monotonic(), ok))
+        if ok:
+            self.latencies.append(seconds)
+
+    def error_rate(self) -> float:
+        # A demoted provider gets no new outcomes, so expiry is what lets it back in
+        cutoff = time.monotonic() - self.error_window
+        while self.outcomes and self.outcomes[0][0] < cutoff:
+            self.outcomes.popleft()
+        return 1 - sum(ok for _, ok in self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, fraction: float, default: float) -> float:
+        if not self.latencies:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def score(self) -> float:
+        """Lower is healthier: median latency inflated by the recent error rate."""
+        return self.percentile(0.5, 1.0) * (1 + 10 * self.error_rate())
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.error_rate(),
+            "p50_seconds": self.percentile(0.5, 0.0),
+            "p95_seconds": self.percentile(0.95, 0.0),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class ModelRouter:
+    """
+    Runnable-like front for the same step implemented by several providers.
+
+    Each call goes to the healthiest provider and fails over to the next one on error.
+    With hedging on, if the chosen provider has not answered within its recent p95
+    latency, the runner-up is called as well and the first answer wins.
+    """
+
+    def __init__(self, runnables: dict, health: dict, limiters: dict = None, hedge: bool = False,
+                 min_hedge_delay: float = 1.0):
+        self.runnables = runnables
+        self.health = health
+        self.limiters = limiters or {}
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+
+    def ranked(self) -> list[str]:
+        # Stable sort keeps the configured preference order between equally healthy providers
+        return sorted(self.runnables, key=lambda name: self.health[name].score())
+
+    async def _call(self, name: str, input):
+        if name in self.limiters:
+            await self.limiters[name].acquire(estimate_tokens(input))
+        started = time.perf_counter()
+        try:
+            result = await self.runnables[name].ainvoke(input)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.health[name].record(time.perf_counter() - started, ok=False)
+            raise
+        self.health[name].record(time.perf_counter() - started, ok=True)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        order = self.ranked()
+        if self.hedge and len(order) > 1:
+            return await self._hedged(order, input)
+        error = None
+        for name in order:
+            try:
+                return await self._call(name, input)
+            except Exception as e:
+                print(f"Provider {name} failed: {e}")
+                error = e
+        raise error
+
+    async def _hedged(self, order: list[str], input):
+        primary, backup = order[0], order[1]
+        delay = max(self.min_hedge_delay, self.health[primary].percentile(0.95, self.min_hedge_delay))
+        tasks = {asyncio.ensure_future(self._call(primary, input)): primary}
+        errors = []
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done or next(iter(done)).exception() is not None:
+                self.health[primary].hedged += 1
+                tasks[asyncio.ensure_future(self._call(backup, input))] = backup
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] == backup:
+                            self.health[backup].hedge_wins += 1
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in tasks:
+                task.cancel()
+        # Prefer surfacing a throttling error so callers can back off
+        raise next((e for e in errors if is_rate_limit_error(e)), errors[-1])
+
+    async def abatch(self, inputs, config=None, return_exceptions=False, **kwargs):
+        return await asyncio.gather(*(self.ainvoke(input) for input in inputs), return_exceptions=return_exceptions)
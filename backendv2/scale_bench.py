@@ -0,0 +1,156 @@
+"""
+Multi-worker throughput benchmark for backendv2.
+
+For each worker count, starts `uvicorn bench_app:app --workers N` with the bench.py fakes,
+drives /evaluate-guess over HTTP from several client processes, and reports requests per
+second and scaling efficiency against a single worker. The fake LLM and search are fast
+by default, so the app itself is the bottleneck. All workers share counters, rate limits
+and single-flight locks through SHARED_STATE_URL, a scratch SQLite file unless given.
+
+Usage:
+    python scale_bench.py --workers 1 2 4 --requests 2000 --concurrency 64
+    python scale_bench.py --shared-state redis://localhost:6379/15 --output scale.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from bench import GUESS_WORDS, setup_environment, summarize, git_commit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 60):
+    """Wait for /ready to succeed several times in a row, so each worker has likely built its graph."""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 10:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server at {base_url} did not become ready")
+        try:
+            streak = streak + 1 if httpx.get(base_url + "/ready", timeout=2).status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        time.sleep(0.1)
+
+
+async def send_requests(base_url: str, jobs: list[dict], concurrency: int) -> tuple[list[float], int]:
+    import httpx
+
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                body = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    ok = (await client.post("/evaluate-guess", json=body)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += 0 if ok else 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(base_url: str, jobs: list[dict], concurrency: int):
+    return asyncio.run(send_requests(base_url, jobs, concurrency))
+
+
+def make_jobs(count: int, shows: int, rng: random.Random) -> list[dict]:
+    # Fresh word-salad guesses, so caches do not hide the work
+    return [
+        {"tv_show_name": f"Show {rng.randrange(shows)}", "guess": " ".join(rng.choice(GUESS_WORDS) for _ in range(8))}
+        for _ in range(count)
+    ]
+
+
+def run_workers(args, workers: int) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, BENCH_ARGS=args.bench_args)
+    if args.shared_state:
+        env["SHARED_STATE_URL"] = args.shared_state
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_app:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=HERE, env=env,
+    )
+    try:
+        wait_until_ready(base_url)
+        jobs = make_jobs(args.requests, args.shows, random.Random(args.seed + workers))
+        shares = [jobs[i::args.clients] for i in range(args.clients)]
+        per_client = max(1, args.concurrency // args.clients)
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.clients) as pool:
+            outcomes = pool.starmap(client_process, [(base_url, share, per_client) for share in shares])
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies = [latency for client_latencies, _ in outcomes for latency in client_latencies]
+    return {
+        "workers": workers,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(jobs) / elapsed,
+        "latency": {**summarize(latencies), "errors": sum(errors for _, errors in outcomes)},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight requests across all client processes")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--shows", type=int, default=20)
+    parser.add_argument("--shared-state", help="SHARED_STATE_URL for the workers, e.g. redis://localhost:6379/15")
+    parser.add_argument("--bench-args", default="--llm-latency 0.005 --search-latency 0.002",
+                        help="bench.py flags for the fakes in every worker")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    runs = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as workdir:
+            setup_environment(args, workdir)
+            runs.append(run_workers(args, workers))
+    baseline = next((result for result in runs if result["workers"] == 1), runs[0])
+    per_worker = baseline["requests_per_second"] / baseline["workers"]
+    for result in runs:
+        result["scaling_efficiency"] = result["requests_per_second"] / (per_worker * result["workers"])
+    report = {"commit": git_commit(), "config": vars(args), "cpu_count": os.cpu_count(), "results": runs}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,179 @@
+import re
+import json
+import time
+import zlib
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from cache import normalize_text, tokenize
+
+EMBEDDING_DIM = 1024
+
+# Words that flip the meaning of a guess; "doesn't" normalizes to "doesn t"
+NEGATIONS = {"not": "not", "t": "not", "cannot": "not", "no": "no", "never": "never", "nobody": "nobody",
+             "nothing": "nothing", "none": "none", "neither": "neither", "nor": "nor", "without": "without"}
+
+
+def embed(text: str) -> np.ndarray:
+    """
+    Hashed bag-of-features embedding computed locally: stemmed content words plus
+    character trigrams, so reordered or re-inflected paraphrases land close together.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for word in tokenize(text):
+        vector[zlib.crc32(word.encode()) % EMBEDDING_DIM] += 1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % EMBEDDING_DIM] += 0.3
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def negations(text: str) -> list[str]:
+    return sorted(NEGATIONS[word] for word in normalize_text(text).split() if word in NEGATIONS)
+
+
+def coordinated(text: str) -> set[str]:
+    """
+    Stemmed words joined by "and" ("House and Cuddy", "Jon Snow and Daenerys"): the
+    word on each side of it, extended over adjacent capitalized words to cover full names.
+    """
+    words = re.findall(r"\w+", text)
+    found = []
+    for i, word in enumerate(words):
+        if word.lower() != "and":
+            continue
+        start, end = i - 1, i + 1
+        while start > 0 and words[start - 1][:1].isupper():
+            start -= 1
+        while end + 1 < len(words) and words[end + 1][:1].isupper():
+            end += 1
+        found.extend(words[max(start, 0):i] + words[i + 1:end + 1])
+    return set(tokenize(" ".join(found)))
+
+
+def compatible(guess: str, other: str) -> bool:
+    """
+    Whether two similar guesses can share an evaluation. The embedding ignores word order
+    and barely notices a "not", so both guesses must carry the same negations, and the
+    participants they share must appear in the same order, which keeps who does what to
+    whom ("Jon kills Dany" is not "Dany kills Jon"). Participants coordinated with "and"
+    in either guess have no role to swap and are left out of the order check, so "House
+    and Cuddy get married" matches "Cuddy marries House".
+    """
+    if negations(guess) != negations(other):
+        return False
+    words, other_words = tokenize(guess), tokenize(other)
+    shared = (set(words) & set(other_words)) - coordinated(guess) - coordinated(other)
+    return list(dict.fromkeys(w for w in words if w in shared)) == list(dict.fromkeys(w for w in other_words if w in shared))
+
+
+class SemanticCache:
+    """
+    Per-show nearest-neighbour index over past guesses and their evaluations. A past
+    guess is reused only if it clears the threshold and is `compatible` with the new one.
+
+    Entries are appended to a SQLite table, so a write costs one row whatever the index
+    size and any number of worker processes can share the file. Each show's unit
+    embeddings are held in memory once queried, for at most `max_loaded_shows` shows,
+    and topped up with rows added since by any process. Entries expire after `ttl`
+    seconds and only the newest `max_per_show` of a show are kept.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.95, ttl: float = 7 * 24 * 3600,
+                 max_per_show: int = 5000, max_loaded_shows: int = 256):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_show = max_per_show
+        self.max_loaded_shows = max_loaded_shows
+        self.hits = 0
+        self.misses = 0
+        self._shows = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_entries ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, show_key TEXT NOT NULL, guess TEXT NOT NULL, "
+            "value TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS semantic_entries_show ON semantic_entries (show_key, id)")
+        self._conn.commit()
+
+    def _load(self, show_key: str, now: float):
+        """The show's live entries, after reading rows appended since the last call."""
+        show = self._shows.pop(show_key, None)
+        if show is None:
+            show = {"last_id": 0, "vectors": np.zeros((0, EMBEDDING_DIM), dtype=np.float32), "entries": []}
+        rows = self._conn.execute(
+            "SELECT id, guess, value, vector, created_at FROM semantic_entries "
+            "WHERE show_key = ? AND id > ? AND created_at >= ? ORDER BY id DESC LIMIT ?",
+            (show_key, show["last_id"], now - self.ttl, self.max_per_show),
+        ).fetchall()[::-1]
+        if rows:
+            show["last_id"] = rows[-1][0]
+            new_vectors = np.stack([np.frombuffer(vector, dtype=np.float32) for _, _, _, vector, _ in rows])
+            show["vectors"] = np.vstack([show["vectors"], new_vectors])
+            show["entries"] = show["entries"] + [
+                {"guess": guess, "value": json.loads(value), "created_at": created_at}
+                for _, guess, value, _, created_at in rows
+            ]
+        # Entries are in insertion order, so the expired ones and the overflow are a prefix
+        start = max(0, len(show["entries"]) - self.max_per_show)
+        while start < len(show["entries"]) and show["entries"][start]["created_at"] < now - self.ttl:
+            start += 1
+        if start:
+            show["vectors"], show["entries"] = show["vectors"][start:], show["entries"][start:]
+        self._shows[show_key] = show
+        while len(self._shows) > self.max_loaded_shows:
+            self._shows.popitem(last=False)
+        return show["vectors"], show["entries"]
+
+    def get(self, tv_show_name: str, guess: str):
+        """Return the evaluation of the most similar compatible past guess that clears the threshold."""
+        show_key = normalize_text(tv_show_name)
+        query = embed(guess)
+        with self._lock:
+            vectors, entries = self._load(show_key, time.time())
+            if len(entries):
+                scores = vectors @ query
+                for i in np.argsort(-scores):
+                    if scores[i] < self.threshold:
+                        break
+                    if compatible(guess, entries[i]["guess"]):
+                        self.hits += 1
+                        return entries[i]["value"]
+            self.misses += 1
+        return None
+
+    def add(self, tv_show_name: str, guess: str, value: dict):
+        show_key = normalize_text(tv_show_name)
+        vector = embed(guess)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO semantic_entries (show_key, guess, value, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                (show_key, guess, json.dumps(value), vector.tobytes(), now),
+            )
+            self._maybe_prune(show_key, now)
+            self._conn.commit()
+
+    def _maybe_prune(self, show_key: str, now: float):
+        # Loaded shows skip expired and overflowing rows anyway; drop them from disk now and then
+        if random.random() < 0.02:
+            self._conn.execute("DELETE FROM semantic_entries WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM semantic_entries WHERE show_key = ? AND id <= "
+                "(SELECT id FROM semantic_entries WHERE show_key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (show_key, show_key, self.max_per_show),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = sum(len(show["entries"]) for show in self._shows.values())
+        return {"hits": self.hits, "misses": self.misses, "loaded_shows": len(self._shows), "loaded_entries": size}
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,94 @@
+import os
+import json
+import bisect
+from collections import OrderedDict
+from cache import normalize_text
+
+ARTICLES = ("the ", "a ", "an ")
+
+
+class SeriesIndex:
+    """
+    In-memory prefix index of TV series titles backed by a sorted array, with an LRU
+    of recent query results in front of it.
+
+    Titles learned from OMDB responses are appended to `path` so the index survives
+    restarts; `load_dataset` bulk-loads a larger title list.
+    """
+
+    def __init__(self, path: str = None, lru_size: int = 5000):
+        self.path = path
+        self.lru_size = lru_size
+        self._keys = []
+        self._titles = set()
+        self._lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load_dataset(path, persist=False)
+
+    def add(self, title: str, persist: bool = True) -> bool:
+        """Index a title; returns False if it was already known."""
+        title = title.strip()
+        if not title or title in self._titles:
+            return False
+        self._titles.add(title)
+        key = normalize_text(title)
+        keys = [key]
+        # "The Office" is also found by typing "office"
+        for article in ARTICLES:
+            if key.startswith(article):
+                keys.append(key[len(article):])
+        for indexed in keys:
+            bisect.insort(self._keys, (indexed, title))
+        # Cached results for prefixes of the new title are now incomplete
+        for query in [query for query in self._lru if any(indexed.startswith(query) for indexed in keys)]:
+            del self._lru[query]
+        if persist and self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(title + "\n")
+        return True
+
+    def load_dataset(self, path: str, persist: bool = True) -> int:
+        """Load titles from a text file (one per line) or JSON lines with a "title"/"Title" field."""
+        added = 0
+        self._lru.clear()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("{"):
+                    record = json.loads(line)
+                    line = record.get("title") or record.get("Title") or ""
+                added += self.add(line, persist=persist)
+        return added
+
+    def search(self, prefix: str, limit: int = 5) -> list[str]:
+        key = normalize_text(prefix)
+        if not key:
+            return []
+        results = []
+        index = bisect.bisect_left(self._keys, (key, ""))
+        while index < len(self._keys) and self._keys[index][0].startswith(key) and len(results) < limit:
+            title = self._keys[index][1]
+            if title not in results:
+                results.append(title)
+            index += 1
+        return results
+
+    def cached(self, query: str):
+        key = normalize_text(query)
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return self._lru[key]
+        self.misses += 1
+        return None
+
+    def remember(self, query: str, results: list[str]):
+        self._lru[normalize_text(query)] = results
+        self._lru.move_to_end(normalize_text(query))
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"titles": len(self._titles), "lru_size": len(self._lru), "lru_hits": self.hits, "lru_misses": self.misses}
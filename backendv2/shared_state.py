@@ -0,0 +1,257 @@
+"""
+State shared by every worker process, and by every host with Redis: counters, a key/value
+cache with expiry, locks for cross-process single-flight and token buckets for rate limits.
+
+SHARED_STATE_URL picks the backend:
+    sqlite:///store.db          one host, any number of uvicorn workers (file-locked SQLite)
+    redis://localhost:6379/0    several hosts (needs the `redis` package)
+
+All methods block; call them from async code through asyncio.to_thread.
+"""
+import abc
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SharedState(abc.ABC):
+    """Interface of the shared state backends; see SQLiteSharedState and RedisSharedState."""
+
+    @abc.abstractmethod
+    def incr(self, name: str, amount: int = 1) -> int:
+        """Atomically add `amount` to a counter and return the new value."""
+
+    @abc.abstractmethod
+    def get_counter(self, name: str) -> int:
+        """Current value of a counter, 0 if it was never incremented."""
+
+    @abc.abstractmethod
+    def seed_counter(self, name: str, value: int):
+        """Set a counter only if it does not exist yet, e.g. from an older store."""
+
+    @abc.abstractmethod
+    def cache_get(self, key: str):
+        """Cached string value, or None if missing or expired."""
+
+    @abc.abstractmethod
+    def cache_set(self, key: str, value: str, ttl: float):
+        """Store a string value that expires after `ttl` seconds."""
+
+    @abc.abstractmethod
+    def acquire_lock(self, key: str, ttl: float):
+        """Return an owner token if the lock was free, else None. The lock expires after `ttl` seconds."""
+
+    @abc.abstractmethod
+    def release_lock(self, key: str, token: str):
+        """Release a lock, only if `token` still owns it."""
+
+    @abc.abstractmethod
+    def take_tokens(self, buckets: list[tuple[str, float, float, float]]) -> float:
+        """
+        Take tokens from several (key, rate, capacity, amount) buckets, all or nothing.
+        Returns 0 on success, otherwise the seconds until every bucket could grant.
+        """
+
+
+class SQLiteSharedState(SharedState):
+    """
+    SharedState in a SQLite file. Updates run in BEGIN IMMEDIATE transactions, which take
+    the database write lock, so they are atomic across threads and processes on one host.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS shared_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS shared_locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS token_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode, transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._transaction() as conn:
+            (value,) = conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value RETURNING value",
+                (name, amount),
+            ).fetchone()
+        return value
+
+    def get_counter(self, name: str) -> int:
+        row = self._conn().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def seed_counter(self, name: str, value: int):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)", (name, value))
+
+    def cache_get(self, key: str):
+        row = self._conn().execute(
+            "SELECT value FROM shared_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def cache_set(self, key: str, value: str, ttl: float):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, time.time() + ttl),
+            )
+            self._maybe_prune(conn)
+
+    def acquire_lock(self, key: str, ttl: float):
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO shared_locks (key, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE shared_locks.expires_at <= ?",
+                (key, token, now + ttl, now),
+            )
+            acquired = cursor.rowcount == 1
+        return token if acquired else None
+
+    def release_lock(self, key: str, token: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM shared_locks WHERE key = ? AND token = ?", (key, token))
+
+    def take_tokens(self, buckets: list[tuple[str, float, float, float]]) -> float:
+        now = time.time()
+        with self._transaction() as conn:
+            levels = []
+            wait = 0.0
+            for key, rate, capacity, amount in buckets:
+                row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+                levels.append(tokens)
+                if tokens < amount:
+                    wait = max(wait, (min(amount, capacity) - tokens) / rate)
+            if wait:
+                return wait
+            conn.executemany(
+                "INSERT INTO token_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                [(key, tokens - amount, now) for (key, _, _, amount), tokens in zip(buckets, levels)],
+            )
+            self._maybe_prune(conn)
+        return 0.0
+
+    def _maybe_prune(self, conn: sqlite3.Connection):
+        # Expired entries and buckets idle for an hour (full again) are dropped now and then
+        if random.random() < 0.001:
+            now = time.time()
+            conn.execute("DELETE FROM shared_cache WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM shared_locks WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM token_buckets WHERE updated < ?", (now - 3600,))
+
+
+# Multi-bucket take, all or nothing. KEYS are buckets; ARGV holds rate, capacity, amount
+# per key. Server time keeps hosts with skewed clocks consistent. The wait is returned
+# as a string because Redis truncates Lua numbers to integers.
+TAKE_TOKENS_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate, capacity, amount = tonumber(ARGV[3 * i - 2]), tonumber(ARGV[3 * i - 1]), tonumber(ARGV[3 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < amount then
+        wait = math.max(wait, (math.min(amount, capacity) - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate, capacity, amount = tonumber(ARGV[3 * i - 2]), tonumber(ARGV[3 * i - 1]), tonumber(ARGV[3 * i])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - amount), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+end
+return '0'
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSharedState(SharedState):
+    """SharedState on a Redis server (or anything speaking its protocol), for several hosts."""
+
+    def __init__(self, url: str, prefix: str = "guesstheplot:"):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._take_tokens = self.redis.register_script(TAKE_TOKENS_SCRIPT)
+        self._release_lock = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        return self.redis.incrby(self.prefix + "counter:" + name, amount)
+
+    def get_counter(self, name: str) -> int:
+        return int(self.redis.get(self.prefix + "counter:" + name) or 0)
+
+    def seed_counter(self, name: str, value: int):
+        self.redis.set(self.prefix + "counter:" + name, value, nx=True)
+
+    def cache_get(self, key: str):
+        return self.redis.get(self.prefix + "cache:" + key)
+
+    def cache_set(self, key: str, value: str, ttl: float):
+        self.redis.set(self.prefix + "cache:" + key, value, px=max(1, int(ttl * 1000)))
+
+    def acquire_lock(self, key: str, ttl: float):
+        token = uuid.uuid4().hex
+        acquired = self.redis.set(self.prefix + "lock:" + key, token, nx=True, px=max(1, int(ttl * 1000)))
+        return token if acquired else None
+
+    def release_lock(self, key: str, token: str):
+        self._release_lock(keys=[self.prefix + "lock:" + key], args=[token])
+
+    def take_tokens(self, buckets: list[tuple[str, float, float, float]]) -> float:
+        keys = [self.prefix + "bucket:" + key for key, _, _, _ in buckets]
+        args = [value for _, rate, capacity, amount in buckets for value in (rate, capacity, amount)]
+        return float(self._take_tokens(keys=keys, args=args))
+
+
+def from_url(url: str) -> SharedState:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedState(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteSharedState(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
@@ -0,0 +1,66 @@
+import json
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the coroutine
+    and every caller that arrives while it is running awaits the same result.
+
+    With a SharedState, the leader also takes a shared lock on the key, so other worker
+    processes wait for its result (published for `result_ttl` seconds) instead of
+    running the same call. Results must then be JSON-serializable.
+    """
+
+    def __init__(self, shared=None, lock_ttl: float = 120, result_ttl: float = 60, poll_interval: float = 0.2):
+        self.shared = shared
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_coalesced = 0
+
+    async def do(self, key, fn):
+        """Await `fn()` for `key`, joining the in-flight call if there is one."""
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._lead(key, fn) if self.shared else fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller disconnecting does not cancel the evaluation for the others
+        return await asyncio.shield(task)
+
+    async def _lead(self, key, fn):
+        lock_key, result_key = f"singleflight:lock:{key}", f"singleflight:result:{key}"
+        waited = False
+        while True:
+            token = await asyncio.to_thread(self.shared.acquire_lock, lock_key, self.lock_ttl)
+            if token is not None:
+                try:
+                    result = await fn()
+                    await asyncio.to_thread(self.shared.cache_set, result_key, json.dumps(result), self.result_ttl)
+                    return result
+                finally:
+                    await asyncio.to_thread(self.shared.release_lock, lock_key, token)
+            # Another process is running it; take its result once published, or the
+            # lock if that process gives up or dies
+            if not waited:
+                waited = True
+                self.remote_coalesced += 1
+            await asyncio.sleep(self.poll_interval)
+            published = await asyncio.to_thread(self.shared.cache_get, result_key)
+            if published is not None:
+                return json.loads(published)
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_coalesced": self.remote_coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,105 @@
+"""
+Cold start benchmark for backendv2.
+
+In fresh interpreters, measures how long `import main` takes and how long the first
+graph build (models, routers, compile) takes after it, then lists the slowest
+modules imported directly by main, as reported by `python -X importtime`.
+
+Usage:
+    python startup_bench.py --runs 5 --top 15 --output startup.json
+
+Stores are pointed at a scratch directory, so the run does not touch local data.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from bench import setup_environment, git_commit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TIMING_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.init_graph()
+built = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "graph_build_seconds": built - imported}))
+"""
+
+
+def time_startup() -> dict:
+    completed = subprocess.run([sys.executable, "-c", TIMING_SCRIPT], cwd=HERE, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str, parent: str = "main") -> tuple[int, list[tuple[str, int, int]]]:
+    """
+    Cumulative microseconds of the top-level import `parent`, and (module, self_us,
+    cumulative_us) for each module it imports directly, from `-X importtime` output.
+    """
+    # A module is reported after everything it imports, indented by two spaces per level,
+    # so the direct children of a top-level import are the depth 1 lines just before it
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        if depth == 1:
+            children.append((name.strip(), int(self_us), int(cumulative_us)))
+        elif depth == 0:
+            if name.strip() == parent:
+                return int(cumulative_us), children
+            children = []
+    return 0, []
+
+
+def slowest_imports(top: int) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=HERE, capture_output=True, text=True, check=True
+    )
+    total_us, imports = parse_importtime(completed.stderr)
+    ranked = sorted(imports, key=lambda item: item[2], reverse=True)
+    return {
+        "total_seconds": total_us / 1e6,
+        "slowest": [{"module": name, "cumulative_seconds": cumulative / 1e6} for name, _, cumulative in ranked[:top]],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest direct imports of main to list")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_environment(args, workdir)
+        timings = [time_startup() for _ in range(args.runs)]
+        imports = slowest_imports(args.top)
+    report = {
+        "commit": git_commit(),
+        "config": vars(args),
+        "results": {
+            key: {"median": statistics.median(t[key] for t in timings), "max": max(t[key] for t in timings)}
+            for key in ("import_seconds", "graph_build_seconds")
+        },
+        "imports": imports,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
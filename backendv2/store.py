@@ -0,0 +1,111 @@
+"""
+Append-only SQLite store (WAL mode) for the evaluation counter and user feedback.
+
+Replaces the count.txt / feedback.json read-modify-write files. Safe to share between
+threads and between uvicorn worker processes on the same host.
+
+Export to the old formats:
+    python store.py export-feedback feedback.json
+    python store.py export-count count.txt
+"""
+import os
+import sys
+import json
+import sqlite3
+import threading
+
+
+class Store:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, "
+            "name TEXT NOT NULL, email TEXT NOT NULL, feedback TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers and the single writer proceed together
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def increment(self, name: str, amount: int = 1) -> int:
+        """Atomically add `amount` to a counter and return the new value."""
+        conn = self._conn()
+        with conn:
+            (value,) = conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value RETURNING value",
+                (name, amount),
+            ).fetchone()
+        return value
+
+    def get_counter(self, name: str) -> int:
+        row = self._conn().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def add_feedback(self, entry: dict):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO feedback (timestamp, name, email, feedback) VALUES (?, ?, ?, ?)",
+                (entry["timestamp"], entry["name"], entry["email"], entry["feedback"]),
+            )
+
+    def iter_feedback(self):
+        rows = self._conn().execute("SELECT timestamp, name, email, feedback FROM feedback ORDER BY id")
+        for timestamp, name, email, feedback in rows:
+            yield {"timestamp": timestamp, "name": name, "email": email, "feedback": feedback}
+
+    def import_legacy(self, count_file: str = "count.txt", feedback_file: str = "feedback.json"):
+        """
+        Seed the store from the old files the first time it is opened. Every worker calls
+        this at startup; the write lock taken up front and the INSERT OR IGNORE claims make
+        sure only one of them imports.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if os.path.exists(count_file):
+                with open(count_file, "r") as f:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO counters (name, value) VALUES ('evaluations', ?)",
+                        (int(f.read().strip() or 0),),
+                    )
+            if os.path.exists(feedback_file):
+                claimed = conn.execute(
+                    "INSERT OR IGNORE INTO counters (name, value) VALUES ('legacy_feedback_imported', 1)"
+                ).rowcount
+                has_feedback = conn.execute("SELECT 1 FROM feedback LIMIT 1").fetchone()
+                if claimed and not has_feedback:
+                    with open(feedback_file, "r", encoding="utf-8") as f:
+                        entries = json.load(f)
+                    conn.executemany(
+                        "INSERT INTO feedback (timestamp, name, email, feedback) VALUES (?, ?, ?, ?)",
+                        [(e["timestamp"], e.get("name", ""), e.get("email", ""), e["feedback"]) for e in entries],
+                    )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+if __name__ == "__main__":
+    store = Store(os.getenv("STORE_PATH", "store.db"))
+    if len(sys.argv) == 3 and sys.argv[1] == "export-feedback":
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            json.dump(list(store.iter_feedback()), f, indent=2, ensure_ascii=False)
+    elif len(sys.argv) == 3 and sys.argv[1] == "export-count":
+        with open(sys.argv[2], "w") as f:
+            f.write(str(store.get_counter("evaluations")))
+    else:
+        print(__doc__)
+        sys.exit(1)
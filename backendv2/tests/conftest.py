@@ -0,0 +1,18 @@
+import os
+import sys
+import random
+import pytest
+
+# The backend modules are imported flat, as uvicorn does from backendv2/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_main(tmp_path_factory):
+    """main with the bench.py fakes, its stores in a scratch directory."""
+    import bench
+    args = bench.parse_args(["--llm-latency", "0.05", "--search-latency", "0.05"])
+    bench.setup_environment(args, str(tmp_path_factory.mktemp("stores")))
+    import main
+    bench.install_fakes(main, args, random.Random(args.seed))
+    return main
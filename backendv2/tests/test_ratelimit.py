@@ -0,0 +1,29 @@
+import time
+import asyncio
+import pytest
+from ratelimit import AdmissionController, RateLimited
+from shared_state import SQLiteSharedState
+
+
+def controller(shared=None):
+    return AdmissionController(global_rate=20, global_burst=2, client_rate=1, client_burst=1,
+                               max_queue_wait=0, shared=shared)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_pace_charges_global_bucket_per_item(tmp_path, shared):
+    admission = controller(SQLiteSharedState(str(tmp_path / "state.db")) if shared else None)
+
+    async def scenario():
+        started = time.monotonic()
+        for _ in range(6):
+            await admission.pace()
+        elapsed = time.monotonic() - started
+        # The paced items used up the global burst, so an interactive request must wait
+        with pytest.raises(RateLimited):
+            await admission.admit("someone")
+        return elapsed
+
+    # 2 from the burst, 4 more at 20 per second
+    assert asyncio.run(scenario()) >= 0.15
+    assert admission.stats()["paced"] == 6
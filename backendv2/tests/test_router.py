@@ -0,0 +1,42 @@
+import time
+import asyncio
+from router import ModelRouter, ProviderHealth
+
+
+class Provider:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.failing = False
+        self.calls = 0
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.failing:
+            raise RuntimeError("outage")
+        return input
+
+
+def test_provider_recovers_after_short_outage():
+    openai, gemini = Provider(0.01), Provider(0.02)
+    health = {"openai": ProviderHealth(error_window=1), "gemini": ProviderHealth(error_window=1)}
+    models = ModelRouter({"openai": openai, "gemini": gemini}, health)
+
+    async def calls(count):
+        for i in range(count):
+            await models.ainvoke(i)
+
+    asyncio.run(calls(5))
+    openai.failing = True
+    asyncio.run(calls(3))
+    openai.failing = False
+    openai.calls = 0
+
+    # Still demoted while the outage is recent
+    asyncio.run(calls(20))
+    assert openai.calls == 0
+
+    # Once the errors expire, the faster preferred provider takes the traffic again
+    time.sleep(1.1)
+    asyncio.run(calls(20))
+    assert openai.calls == 20
@@ -0,0 +1,18 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_search_deadline_starts_when_the_search_runs(app_main, monkeypatch):
+    def slow_search(tv_show_name, query):
+        time.sleep(0.2)
+        return [{"title": query, "body": "snippet"}]
+
+    # Four searches queue on one thread; each needs 0.2 s of its 0.3 s deadline
+    monkeypatch.setattr(app_main, "search_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(app_main, "SEARCH_TIMEOUT", 0.3)
+    monkeypatch.setattr(app_main, "cached_search", slow_search)
+
+    queries = [f"query {i}" for i in range(4)]
+    results = asyncio.run(app_main.run_searches("Some Show", queries))
+    assert [query for query, _ in results] == queries
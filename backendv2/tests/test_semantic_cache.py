@@ -0,0 +1,83 @@
+import time
+import pytest
+from semantic_cache import SemanticCache, compatible
+
+OPPOSITE_GUESSES = [
+    ("Ned Stark is executed by Joffrey", "Joffrey is executed by Ned Stark"),
+    ("Jon Snow kills Daenerys", "Daenerys kills Jon Snow"),
+    ("Ross and Rachel get back together in the final episode",
+     "Ross and Rachel do not get back together in the final episode"),
+    ("Walter White poisons Brock to manipulate Jesse",
+     "Walter White does not poison Brock to manipulate Jesse"),
+]
+
+PARAPHRASES = [
+    ("Walter White poisons Brock", "Walter White poisoned Brock"),
+    ("Jon Snow kills Daenerys", "Jon Snow killed Daenerys in the end"),
+    ("House and Cuddy get married", "Cuddy marries House"),
+    ("Cuddy marries House", "House and Cuddy get married"),
+    ("House and Cuddy get married", "House marries Cuddy"),
+]
+
+
+@pytest.mark.parametrize("guess, other", OPPOSITE_GUESSES)
+def test_opposite_guesses_are_not_compatible(guess, other):
+    assert not compatible(guess, other)
+    assert not compatible(other, guess)
+
+
+@pytest.mark.parametrize("guess, other", PARAPHRASES + [
+    ("Ross and Rachel don't get back together", "Ross and Rachel do not get back together"),
+])
+def test_paraphrases_are_compatible(guess, other):
+    assert compatible(guess, other)
+
+
+@pytest.mark.parametrize("guess, other", OPPOSITE_GUESSES)
+def test_opposite_guess_misses_cache(tmp_path, guess, other):
+    cache = SemanticCache(str(tmp_path / "semantic.db"))
+    cache.add("Some Show", guess, {"is_correct": True})
+    assert cache.get("Some Show", other) is None
+
+
+@pytest.mark.parametrize("guess, other", PARAPHRASES)
+def test_paraphrase_hits_cache(tmp_path, guess, other):
+    cache = SemanticCache(str(tmp_path / "semantic.db"))
+    cache.add("Some Show", guess, {"is_correct": True})
+    assert cache.get("Some Show", other) == {"is_correct": True}
+    assert cache.get("Other Show", other) is None
+
+
+def test_entries_are_shared_through_the_file(tmp_path):
+    # Two instances on one file stand in for two worker processes
+    writer = SemanticCache(str(tmp_path / "semantic.db"))
+    reader = SemanticCache(str(tmp_path / "semantic.db"))
+    assert reader.get("Some Show", "Jon Snow killed Daenerys") is None
+    writer.add("Some Show", "Jon Snow kills Daenerys", {"is_correct": True})
+    assert reader.get("Some Show", "Jon Snow killed Daenerys") == {"is_correct": True}
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.db"), ttl=0.05)
+    cache.add("Some Show", "Jon Snow kills Daenerys", {"is_correct": True})
+    assert cache.get("Some Show", "Jon Snow kills Daenerys") is not None
+    time.sleep(0.1)
+    assert cache.get("Some Show", "Jon Snow kills Daenerys") is None
+
+
+def test_only_newest_entries_per_show_are_kept(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.db"), max_per_show=2)
+    for i in range(4):
+        cache.add("Some Show", f"Guess number {i} happens", {"i": i})
+    assert cache.get("Some Show", "Guess number 0 happens") is None
+    assert cache.get("Some Show", "Guess number 3 happens") == {"i": 3}
+    assert cache.stats()["loaded_entries"] == 2
+
+
+def test_loaded_shows_are_bounded(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.db"), max_loaded_shows=2)
+    for show in ("One", "Two", "Three"):
+        cache.add(show, "Jon Snow kills Daenerys", {"show": show})
+        cache.get(show, "Jon Snow kills Daenerys")
+    assert cache.stats()["loaded_shows"] == 2
+    assert cache.get("One", "Jon Snow kills Daenerys") == {"show": "One"}
@@ -0,0 +1,40 @@
+import asyncio
+from series_index import SeriesIndex
+
+
+def test_add_drops_cached_prefixes_of_the_new_title():
+    index = SeriesIndex()
+    index.remember("br", [])
+    index.remember("off", [])
+    index.remember("x", [])
+    index.add("Breaking Bad", persist=False)
+    index.add("The Office", persist=False)
+    assert index.cached("br") is None
+    assert index.cached("off") is None
+    assert index.cached("x") == []
+    assert index.search("br") == ["Breaking Bad"]
+
+
+def test_omdb_lookups_are_rate_limited_per_client(app_main, monkeypatch):
+    import httpx
+    lookups = []
+
+    async def fake_omdb(query):
+        lookups.append(query)
+        return []
+
+    monkeypatch.setattr(app_main, "OMDB_API_KEY", "test-key")
+    monkeypatch.setattr(app_main, "fetch_omdb_series", fake_omdb)
+    burst = int(app_main.omdb_admission.client_burst)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            too_long = await client.get("/series-suggestions", params={"q": "x" * 101})
+            responses = [await client.get("/series-suggestions", params={"q": f"zzq{i}"}) for i in range(burst + 5)]
+            return too_long, responses
+
+    too_long, responses = asyncio.run(scenario())
+    assert too_long.status_code == 422
+    assert all(response.status_code == 200 for response in responses)
+    assert len(lookups) == burst
@@ -0,0 +1,155 @@
+import time
+import shutil
+import socket
+import subprocess
+import multiprocessing
+import pytest
+from shared_state import SharedState, SQLiteSharedState, RedisSharedState, from_url
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """A throwaway local redis-server, or a skip if there is none."""
+    pytest.importorskip("redis")
+    if shutil.which("redis-server") is None:
+        pytest.skip("redis-server is not installed")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        ["redis-server", "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    try:
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                RedisSharedState(url).redis.ping()
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def state_url(request, tmp_path):
+    if request.param == "sqlite":
+        return f"sqlite:///{tmp_path / 'state.db'}"
+    url = request.getfixturevalue("redis_url")
+    RedisSharedState(url).redis.flushdb()
+    return url
+
+
+@pytest.fixture
+def state(state_url):
+    return from_url(state_url)
+
+
+def test_from_url_picks_backend(tmp_path, state_url):
+    expected = SQLiteSharedState if state_url.startswith("sqlite") else RedisSharedState
+    assert isinstance(from_url(state_url), expected)
+    with pytest.raises(ValueError):
+        from_url("memcached://localhost")
+
+
+def test_counters(state):
+    state.seed_counter("evaluations", 10)
+    state.seed_counter("evaluations", 99)
+    assert state.incr("evaluations") == 11
+    assert state.incr("evaluations", 5) == 16
+    assert state.get_counter("evaluations") == 16
+    assert state.get_counter("missing") == 0
+
+
+def test_cache_expires(state):
+    state.cache_set("key", "value", ttl=0.2)
+    assert state.cache_get("key") == "value"
+    time.sleep(0.3)
+    assert state.cache_get("key") is None
+
+
+def test_lock_has_one_owner(state):
+    token = state.acquire_lock("job", ttl=10)
+    assert token is not None
+    assert state.acquire_lock("job", ttl=10) is None
+    # Only the owner's token releases it
+    state.release_lock("job", "not-the-owner")
+    assert state.acquire_lock("job", ttl=10) is None
+    state.release_lock("job", token)
+    assert state.acquire_lock("job", ttl=10) is not None
+
+
+def test_lock_expires(state):
+    token = state.acquire_lock("job", ttl=0.2)
+    time.sleep(0.3)
+    assert state.acquire_lock("job", ttl=10) is not None
+    # The expired owner can no longer release the new owner's lock
+    state.release_lock("job", token)
+    assert state.acquire_lock("job", ttl=10) is None
+
+
+def test_take_tokens_until_empty(state):
+    bucket = [("client", 1.0, 3.0, 1.0)]
+    assert [state.take_tokens(bucket) for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = state.take_tokens(bucket)
+    assert 0.9 < wait <= 1.0
+
+
+def test_take_tokens_refills(state):
+    bucket = [("client", 20.0, 1.0, 1.0)]
+    assert state.take_tokens(bucket) == 0.0
+    assert state.take_tokens(bucket) > 0
+    time.sleep(0.1)
+    assert state.take_tokens(bucket) == 0.0
+
+
+def test_take_tokens_is_all_or_nothing(state):
+    assert state.take_tokens([("small", 1.0, 1.0, 1.0)]) == 0.0
+    # "small" is empty, so "large" must not be charged either
+    assert state.take_tokens([("large", 1.0, 2.0, 2.0), ("small", 1.0, 1.0, 1.0)]) > 0
+    assert state.take_tokens([("large", 1.0, 2.0, 2.0)]) == 0.0
+
+
+def test_take_tokens_over_capacity_waits_for_full_bucket(state):
+    # A request larger than the bucket waits until it is full rather than forever
+    assert state.take_tokens([("tpm", 10.0, 5.0, 5.0)]) == 0.0
+    wait = state.take_tokens([("tpm", 10.0, 5.0, 50.0)])
+    assert 0.4 < wait <= 0.5
+
+
+def _contend(url, barrier, results):
+    state = from_url(url)
+    barrier.wait()
+    results.put((state.acquire_lock("race", ttl=30) is not None,
+                 sum(state.take_tokens([("race", 0.001, 10.0, 1.0)]) == 0.0 for _ in range(5))))
+
+
+def test_processes_share_locks_and_buckets(state_url):
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(4), context.Queue()
+    workers = [context.Process(target=_contend, args=(state_url, barrier, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join()
+    assert sum(acquired for acquired, _ in outcomes) == 1
+    assert sum(granted for _, granted in outcomes) == 10
+
+
+def test_backends_implement_the_whole_interface():
+    with pytest.raises(TypeError):
+        SharedState()
+
+    class Partial(SharedState):
+        def incr(self, name, amount=1):
+            return amount
+
+    with pytest.raises(TypeError):
+        Partial()
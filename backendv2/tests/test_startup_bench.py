@@ -0,0 +1,22 @@
+from startup_bench import parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+import time:        50 |         50 |     json.decoder
+import time:       200 |        250 |   json
+import time:       300 |        300 |     httpx._client
+import time:       400 |        700 |   httpx
+import time:        10 |        960 | main
+import time:        20 |         20 | atexit_hook
+"""
+
+
+def test_parse_importtime_lists_direct_children_of_main():
+    total_us, children = parse_importtime(IMPORTTIME)
+    assert total_us == 960
+    assert children == [("json", 200, 250), ("httpx", 400, 700)]
+
+
+def test_parse_importtime_without_main():
+    assert parse_importtime("import time:       100 |        100 | site\n") == (0, [])
@@ -0,0 +1,41 @@
+import json
+import multiprocessing
+from store import Store
+
+
+def write_legacy(tmp_path):
+    (tmp_path / "count.txt").write_text("42")
+    (tmp_path / "feedback.json").write_text(json.dumps([
+        {"timestamp": "2024-01-01T00:00:00", "name": "A", "email": "a@example.com", "feedback": "Great"},
+        {"timestamp": "2024-01-02T00:00:00", "feedback": "Meh"},
+    ]))
+
+
+def import_legacy(directory, barrier):
+    store = Store(f"{directory}/store.db")
+    barrier.wait(timeout=20)
+    store.import_legacy(f"{directory}/count.txt", f"{directory}/feedback.json")
+
+
+def test_import_legacy_runs_once(tmp_path):
+    write_legacy(tmp_path)
+    store = Store(str(tmp_path / "store.db"))
+    for _ in range(2):
+        store.import_legacy(str(tmp_path / "count.txt"), str(tmp_path / "feedback.json"))
+    assert store.get_counter("evaluations") == 42
+    assert [entry["feedback"] for entry in store.iter_feedback()] == ["Great", "Meh"]
+
+
+def test_concurrent_workers_import_once(tmp_path):
+    write_legacy(tmp_path)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(4)
+    workers = [context.Process(target=import_legacy, args=(str(tmp_path), barrier)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+    store = Store(str(tmp_path / "store.db"))
+    assert store.get_counter("evaluations") == 42
+    assert len(list(store.iter_feedback())) == 2
@@ -0,0 +1,25 @@
+import asyncio
+
+
+def parse_events(body: str) -> list[str]:
+    return [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+
+
+def test_concurrent_identical_streams_share_one_run(app_main):
+    import httpx
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+            body = {"tv_show_name": "Some Show", "guess": "the captain hides the robot in the castle"}
+            return await asyncio.gather(*(client.post("/evaluate-guess/stream", json=body) for _ in range(10)))
+
+    leaders, coalesced = app_main.evaluations.leaders, app_main.evaluations.coalesced
+    responses = asyncio.run(scenario())
+    streams = [parse_events(response.text) for response in responses]
+    assert all(response.status_code == 200 for response in responses)
+    # Streams that joined the run still get its progress events, then the result
+    assert all(events[0] == "direct_evaluation" and events[-1] == "result" for events in streams)
+    assert app_main.evaluations.leaders - leaders == 1
+    assert app_main.evaluations.coalesced - coalesced == 9
+    assert app_main.stream_listeners == {}
@@ -0,0 +1,20 @@
+import asyncio
+
+
+def test_warm_up_logs_and_retries_failed_builds(app_main, monkeypatch, capsys):
+    attempts = []
+
+    async def flaky_ensure_graph():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("no provider key")
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(app_main, "ensure_graph", flaky_ensure_graph)
+    monkeypatch.setattr(app_main.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(app_main, "warm_up_urls", lambda: [])
+    asyncio.run(app_main.warm_up())
+    assert len(attempts) == 3
+    assert capsys.readouterr().out.count("Warm-up failed") == 2
@@ -0,0 +1,29 @@
+"""
+Warm the search cache for a list of shows ahead of traffic.
+
+Usage:
+    python warm_cache.py "House MD" "Breaking Bad"
+    python warm_cache.py --file shows.txt
+"""
+import sys
+import asyncio
+from main import warm_show
+
+
+async def warm(shows: list[str]):
+    for show in shows:
+        print(f"Warming {show}...")
+        await warm_show(show)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--file"]:
+        with open(args[1], "r", encoding="utf-8") as f:
+            shows = [line.strip() for line in f if line.strip()]
+    else:
+        shows = args
+    if not shows:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(warm(shows))
@@ -18,6 +18,29 @@ interface FeedbackData {
 
 const API_BASE_URL = (process.env.REACT_APP_API_URL ? process.env.REACT_APP_API_URL.replace(/\/$/, '') + "/api": "http://localhost:8000");
 
+const GENERIC_ERROR = 'Something went wrong while evaluating your guess. Please try again.';
+
+const retryMessage = (seconds?: number | null) => {
+  const wait = seconds && seconds > 0 ? Math.ceil(seconds) : null;
+  return wait
+    ? `We're getting a lot of guesses right now. Please try again in ${wait} second${wait === 1 ? '' : 's'}.`
+    : "We're getting a lot of guesses right now. Please try again shortly.";
+};
+
+// Message for a non-2xx response: 429s carry a Retry-After header and a JSON detail
+const errorMessageFor = async (res: Response) => {
+  if (res.status === 429) {
+    return retryMessage(Number(res.headers.get('Retry-After')));
+  }
+  try {
+    const body = await res.json();
+    if (typeof body?.detail === 'string') return body.detail;
+  } catch {
+    // Not JSON, fall through to the generic message
+  }
+  return GENERIC_ERROR;
+};
+
 const GuessPage: React.FC = () => {
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
@@ -40,6 +63,8 @@ const GuessPage: React.FC = () => {
     feedback: ''
   });
   const [feedbackSubmitting, setFeedbackSubmitting] = useState(false);
+  const [progress, setProgress] = useState('Analyzing your guess...');
+  const [errorMessage, setErrorMessage] = useState<string | null>(null);
 
   useEffect(() => {
     if (currentGuess) {
@@ -74,11 +99,11 @@ const GuessPage: React.FC = () => {
       setSeriesSuggestions([]);
       return;
     }
-    fetch(`https://www.omdbapi.com/?apikey=${process.env.REACT_APP_OMDB_API_KEY}&s=${encodeURIComponent(query)}&type=series`)
+    fetch(`${API_BASE_URL}/series-suggestions?q=${encodeURIComponent(query)}`)
       .then(res => res.json())
       .then(data => {
-        if (data && data.Search) {
-          const uniqueTitles = Array.from(new Set(data.Search.map((item: any) => item.Title))) as string[];
+        if (data && data.suggestions && data.suggestions.length) {
+          const uniqueTitles = data.suggestions as string[];
           if (uniqueTitles.length < 2 && !uniqueTitles.includes(query.trim())) {
             setSeriesSuggestions(uniqueTitles.concat(["Use \""+query.trim()+"\""])); // Include the query if not enough suggestions
           }else{
@@ -103,23 +128,68 @@ const GuessPage: React.FC = () => {
     setLoading(true);
     setInput('');
     setResponse(null);
+    setErrorMessage(null);
     setRevealedCards(new Set());
 
     if (textareaRef.current) {
       textareaRef.current.style.height = '2.5em';
     }
 
+    setProgress('Analyzing your guess...');
+
     try {
-      const res = await fetch(API_BASE_URL+ '/evaluate-guess', {
+      const res = await fetch(API_BASE_URL+ '/evaluate-guess/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ guess: newGuess, tv_show_name: selectedSeries })
       });
-      const data = await res.json();
-      setResponse(data as PlotGuessEvaluation);
+      if (!res.ok) {
+        setErrorMessage(await errorMessageFor(res));
+        setLoading(false);
+        return;
+      }
+      if (!res.body) throw new Error('Empty response');
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let searchesDone = 0;
+      let searchesTotal = 0;
+      let finished = false;
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'direct_evaluation') {
+            setProgress('Checking what we already know...');
+          } else if (event === 'searching') {
+            setProgress('Thinking about what to look up...');
+          } else if (event === 'queries_generated') {
+            searchesTotal = data.queries.length;
+            setProgress(`Searching the web (0/${searchesTotal})...`);
+          } else if (event === 'search_completed') {
+            searchesDone += 1;
+            setProgress(`Searching the web (${searchesDone}/${searchesTotal})...`);
+          } else if (event === 'model_started') {
+            setProgress('Evaluating your guess...');
+          } else if (event === 'result') {
+            setResponse(data as PlotGuessEvaluation);
+            finished = true;
+          } else if (event === 'error') {
+            setErrorMessage(data.status === 429 ? retryMessage(data.retry_after) : GENERIC_ERROR);
+            finished = true;
+          }
+        }
+      }
+      if (!finished) setErrorMessage(GENERIC_ERROR);
       setLoading(false);
     } catch (error) {
       console.error('Error:', error);
+      setErrorMessage('Could not reach the server. Please check your connection and try again.');
       setLoading(false);
     }
   };
@@ -223,6 +293,7 @@ const GuessPage: React.FC = () => {
     setSeriesInput('');
     setCurrentGuess('');
     setResponse(null);
+    setErrorMessage(null);
     setRevealedCards(new Set());
   };
 
@@ -356,6 +427,15 @@ const GuessPage: React.FC = () => {
                     </button>
                   </div>
                   
+                  {errorMessage && !loading && (
+                    <div className="flex items-center justify-center h-64 text-center">
+                      <div>
+                        <div className="text-4xl mb-4">⏳</div>
+                        <p className="text-gray-700">{errorMessage}</p>
+                      </div>
+                    </div>
+                  )}
+                  
                   {!response && !loading && !currentGuess && (
                     <div className="flex items-center justify-center h-64 text-gray-500 text-center">
                       <div>
@@ -369,7 +449,7 @@ const GuessPage: React.FC = () => {
                     <div className="flex items-center justify-center h-64">
                       <div className="text-center">
                         <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-[#13a4ec] mx-auto mb-4"></div>
-                        <p className="text-gray-600">Analyzing your guess...</p>
+                        <p className="text-gray-600">{progress}</p>
                       </div>
                     </div>
                   )}